@@ -0,0 +1,48 @@
+from app.auth.async_auth_service import create_user, login
+from app.auth.security import PasswordHasherBusy
+from app.auth.dependencies import verify_refresh_token_async
+from app.auth.auth_controller import hasher_busy, check_signup, check_login, issue_tokens, refreshed_tokens
+from app.schemas.user import UserLogin
+
+async def signup_controller(db, user_data):
+    try:
+        user = await create_user(db, user_data)
+    except PasswordHasherBusy:
+        raise hasher_busy()
+
+    return check_signup(user)
+
+async def login_controller(db, form_data):
+    user_data = UserLogin(
+        email = form_data.username, 
+        password = form_data.password
+    )
+
+    try:
+        user = await login(db, user_data)
+    except PasswordHasherBusy:
+        raise hasher_busy()
+
+    user = check_login(user)
+    refresh_token_obj, tokens = issue_tokens(user)
+
+    db.add(refresh_token_obj)
+    await db.commit()
+
+    return tokens
+
+async def refresh_controller(db, payload):
+    stored_token = await verify_refresh_token_async(payload.refresh_token, db)
+
+    return refreshed_tokens(stored_token)
+
+async def logout_controller(db, payload):
+    refresh_token_obj = await verify_refresh_token_async(
+        payload.refresh_token,
+        db
+    )
+
+    await db.delete(refresh_token_obj)
+    await db.commit()
+
+    return {"message": "Logged out successfully"}
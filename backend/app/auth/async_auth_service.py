@@ -0,0 +1,40 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.user import UserCreate, UserLogin
+from app.models.user import User
+from app.auth.security import hash_password_async, verify_password_async
+
+
+async def create_user(db : AsyncSession, user_data : UserCreate):
+    existing_user = (await db.execute(
+        select(User).filter(User.email == user_data.email)
+    )).scalars().first()
+    
+    if existing_user:
+        return None
+    # no existing user with such mail
+    password_hash = await hash_password_async(user_data.password)
+    new_user = User(
+        email = user_data.email,
+        hashed_password = password_hash,
+        role = user_data.role
+    )
+    db.add(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    return new_user 
+
+async def login(db : AsyncSession, user_data : UserLogin):
+    existing_user = (await db.execute(
+        select(User).filter(User.email == user_data.email)
+    )).scalars().first()
+
+    if not existing_user:
+        return "NOT_REGISTERED" 
+    
+    is_valid_password = await verify_password_async(user_data.password, existing_user.hashed_password)
+
+    if not is_valid_password:
+        return "INVALID_PASSWORD"
+    
+    return existing_user
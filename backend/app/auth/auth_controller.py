@@ -1,13 +1,18 @@
 from app.auth.auth_service import create_user, login
 from fastapi import HTTPException, status
-from app.auth.security import create_access_token, create_refresh_token, get_refresh_token_expiry
+from app.auth.security import create_access_token, create_refresh_token, get_refresh_token_expiry, token_digest, PasswordHasherBusy
 from app.models.refresh_token import RefreshToken
 from app.auth.dependencies import verify_refresh_token
 from app.schemas.user import UserLogin
 
-def signup_controller(db, user_data):
-    user = create_user(db, user_data)
+def hasher_busy():
+    return HTTPException(
+        status_code = status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail = "Too many authentication requests, try again shortly",
+        headers = {"Retry-After" : "1"}
+    )
 
+def check_signup(user):
     if not user:
         raise HTTPException(
             status_code = status.HTTP_400_BAD_REQUEST,
@@ -15,14 +20,7 @@ def signup_controller(db, user_data):
         )
     return user 
 
-def login_controller(db, form_data):
-    user_data = UserLogin(
-        email = form_data.username, 
-        password = form_data.password
-    )
-
-    user = login(db, user_data)
-
+def check_login(user):
     if user == "NOT_REGISTERED":
         raise HTTPException(
             status_code = status.HTTP_400_BAD_REQUEST,
@@ -34,6 +32,9 @@ def login_controller(db, form_data):
             status_code = status.HTTP_401_UNAUTHORIZED,
             detail = "Incorrect Password!"
         )
+    return user
+
+def issue_tokens(user):
     # Access Token (JWT)
     access_token = create_access_token(
         data = {"sub" : str(user.id)}
@@ -41,25 +42,47 @@ def login_controller(db, form_data):
 
     refresh_token = create_refresh_token()
 
-    # Store refresh token in DB
+    # Refresh token row to store in DB
     refresh_token_obj = RefreshToken(
-        token = refresh_token,
+        token_hash = token_digest(refresh_token),
         user_id = user.id,
         expires_at = get_refresh_token_expiry()
     )
 
-    db.add(refresh_token_obj)
-    db.commit()
-
-    return {
+    return refresh_token_obj, {
         "access_token" : access_token,
         "refresh_token" : refresh_token,
         "token_type" : "bearer"
     }
 
-def refresh_controller(db, payload):
-    stored_token = verify_refresh_token(payload.refresh_token, db)
+def signup_controller(db, user_data):
+    try:
+        user = create_user(db, user_data)
+    except PasswordHasherBusy:
+        raise hasher_busy()
 
+    return check_signup(user)
+
+def login_controller(db, form_data):
+    user_data = UserLogin(
+        email = form_data.username, 
+        password = form_data.password
+    )
+
+    try:
+        user = login(db, user_data)
+    except PasswordHasherBusy:
+        raise hasher_busy()
+
+    user = check_login(user)
+    refresh_token_obj, tokens = issue_tokens(user)
+
+    db.add(refresh_token_obj)
+    db.commit()
+
+    return tokens
+
+def refreshed_tokens(stored_token):
     new_access_token = create_access_token(
         data={"sub": str(stored_token.user_id)}
     )
@@ -69,6 +92,11 @@ def refresh_controller(db, payload):
         "token_type": "bearer"
     }
 
+def refresh_controller(db, payload):
+    stored_token = verify_refresh_token(payload.refresh_token, db)
+
+    return refreshed_tokens(stored_token)
+
 def logout_controller(db, payload):
     refresh_token_obj = verify_refresh_token(
         payload.refresh_token,
@@ -1,7 +1,16 @@
+import os
+from datetime import datetime
 from sqlalchemy.orm import Session
 from app.schemas.user import UserCreate, UserLogin
 from app.models.user import User
+from app.models.refresh_token import RefreshToken
 from app.auth.security import hash_password, verify_password
+from config.background import PeriodicTask
+from config.database import SessionLocal
+
+REFRESH_TOKEN_PURGE_BATCH = int(os.getenv("REFRESH_TOKEN_PURGE_BATCH", "1000"))
+# 0 disables the background purge
+REFRESH_TOKEN_PURGE_SECONDS = float(os.getenv("REFRESH_TOKEN_PURGE_SECONDS", "3600"))
 
 
 def create_user(db : Session, user_data : UserCreate):
@@ -37,4 +46,38 @@ def login(db : Session, user_data: UserLogin):
     
     return existing_user
 
-       
\ No newline at end of file
+def purge_expired_refresh_tokens(db : Session, batch_size : int = REFRESH_TOKEN_PURGE_BATCH, now : datetime | None = None):
+    # small chunks, one commit each, so the purge never holds long locks
+    now = now or datetime.utcnow()
+    purged = 0
+
+    while True:
+        ids = [token_id for (token_id,) in db.query(RefreshToken.id).filter(
+            RefreshToken.expires_at < now
+        ).limit(batch_size).all()]
+
+        if not ids:
+            return purged
+
+        db.query(RefreshToken).filter(
+            RefreshToken.id.in_(ids)
+        ).delete(synchronize_session = False)
+        db.commit()
+        purged += len(ids)
+
+        if len(ids) < batch_size:
+            return purged
+
+def _purge_expired_refresh_tokens_job():
+    db = SessionLocal()
+    try:
+        purge_expired_refresh_tokens(db)
+    finally:
+        db.close()
+
+refresh_token_purger = PeriodicTask(
+    "refresh-token-purge",
+    REFRESH_TOKEN_PURGE_SECONDS,
+    _purge_expired_refresh_tokens_job
+)
+
@@ -1,18 +1,21 @@
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
 from datetime import datetime
 
-from config.database import get_db
-from app.auth.security import ALGORITHM, SECRET_KEY
+from config.database import get_db, get_async_db
+from app.auth.security import ALGORITHM, SECRET_KEY, token_digest
 from app.models.user import User
 from app.models.refresh_token import RefreshToken
+from app.auth.principal_cache import Principal, principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl = "/auth/login")
 # refresh_token_scheme = OAuth2PasswordBearer(tokenUrl = "/auth/refresh")
 
-def get_current_user(db : Session = Depends(get_db), token : str = Depends(oauth2_scheme)):
+def decode_access_token(token : str):
     try:
         payload = jwt.decode(
             token,
@@ -31,18 +34,46 @@ def get_current_user(db : Session = Depends(get_db), token : str = Depends(oauth
             status_code = status.HTTP_401_UNAUTHORIZED,
             detail = "Invalid or expired token"
         )
-    
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    
+
+    return int(user_id), payload["exp"]
+
+def _cache_principal(user, token_hash, expires_at):
     if not user or not user.is_active:
         raise HTTPException(
             status_code = status.HTTP_401_UNAUTHORIZED,
             detail = "User not found or inactive"
         )
+
+    principal = Principal(user.id, user.email, user.role, user.is_active)
+    principal_cache.set(token_hash, principal, expires_at)
+
+    return principal
+
+def get_current_user(db : Session = Depends(get_db), token : str = Depends(oauth2_scheme)):
+    token_hash = token_digest(token)
+    principal = principal_cache.get(token_hash)
+
+    if principal is not None:
+        return principal
+
+    user_id, expires_at = decode_access_token(token)
+    user = db.query(User).filter(User.id == user_id).first()
     
-    return user
+    return _cache_principal(user, token_hash, expires_at)
 
-def require_admin(current_user = Depends(get_current_user)):
+async def get_current_user_async(db : AsyncSession = Depends(get_async_db), token : str = Depends(oauth2_scheme)):
+    token_hash = token_digest(token)
+    principal = principal_cache.get(token_hash)
+
+    if principal is not None:
+        return principal
+
+    user_id, expires_at = decode_access_token(token)
+    user = (await db.execute(select(User).filter(User.id == user_id))).scalars().first()
+
+    return _cache_principal(user, token_hash, expires_at)
+
+def _check_admin(current_user):
     if current_user.role != "admin":
         raise HTTPException(
             status_code = status.HTTP_403_FORBIDDEN,
@@ -50,11 +81,13 @@ def require_admin(current_user = Depends(get_current_user)):
         )
     return current_user
 
-def verify_refresh_token(token: str, db: Session):
-    refresh_token = db.query(RefreshToken).filter(
-        RefreshToken.token == token
-    ).first()
+def require_admin(current_user = Depends(get_current_user)):
+    return _check_admin(current_user)
+
+async def require_admin_async(current_user = Depends(get_current_user_async)):
+    return _check_admin(current_user)
 
+def _check_refresh_token(refresh_token):
     if not refresh_token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -69,5 +102,16 @@ def verify_refresh_token(token: str, db: Session):
 
     return refresh_token
 
+def verify_refresh_token(token: str, db: Session):
+    refresh_token = db.query(RefreshToken).filter(
+        RefreshToken.token_hash == token_digest(token)
+    ).first()
+
+    return _check_refresh_token(refresh_token)
 
+async def verify_refresh_token_async(token : str, db : AsyncSession):
+    refresh_token = (await db.execute(select(RefreshToken).filter(
+        RefreshToken.token_hash == token_digest(token)
+    ))).scalars().first()
 
+    return _check_refresh_token(refresh_token)
@@ -0,0 +1,94 @@
+import os
+import time
+import threading
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import event, inspect
+
+from app.models.user import User
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+# What routes need of the authenticated user, detached from any session
+Principal = namedtuple("Principal", ["id", "email", "role", "is_active"])
+
+class PrincipalCache:
+    # Tokens seen before are trusted until min(TTL, token expiry) without
+    # decoding the JWT again or loading the user.
+
+    def __init__(self, ttl_seconds : float, max_entries : int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # token hash -> (expires_at, principal)
+        self._tokens_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, token_hash : bytes):
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(token_hash)
+
+            if entry is None:
+                return None
+
+            expires_at, principal = entry
+
+            if expires_at <= now:
+                self._remove(token_hash)
+                return None
+
+            self._entries.move_to_end(token_hash)
+            return principal
+
+    def set(self, token_hash : bytes, principal : Principal, token_expires_at : float):
+        expires_at = min(time.time() + self.ttl_seconds, token_expires_at)
+
+        with self._lock:
+            self._entries[token_hash] = (expires_at, principal)
+            self._entries.move_to_end(token_hash)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token_hash)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id : int):
+        with self._lock:
+            for token_hash in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token_hash)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _remove(self, token_hash):
+        entry = self._entries.pop(token_hash, None)
+
+        if entry is None:
+            return
+
+        user_id = entry[1].id
+        user_tokens = self._tokens_by_user.get(user_id)
+
+        if user_tokens is not None:
+            user_tokens.discard(token_hash)
+            if not user_tokens:
+                del self._tokens_by_user[user_id]
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_ENTRIES)
+
+# Any ORM write that deactivates a user or changes their role drops their
+# cached principals. Bulk UPDATE statements bypass these hooks and rely on the
+# TTL instead.
+@event.listens_for(User, "after_update")
+def _invalidate_on_update(mapper, connection, target):
+    state = inspect(target)
+
+    if state.attrs.role.history.has_changes() or state.attrs.is_active.history.has_changes():
+        principal_cache.invalidate_user(target.id)
+
+@event.listens_for(User, "after_delete")
+def _invalidate_on_delete(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
@@ -4,6 +4,10 @@ from jose import jwt
 import os 
 from dotenv import load_dotenv
 import secrets
+import hashlib
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 load_dotenv()
 
@@ -12,16 +16,65 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
+# bcrypt runs on its own small pool so a login storm cannot take every
+# request thread; callers beyond PASSWORD_HASH_MAX_PENDING are turned away.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "8"))
+PASSWORD_HASH_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", "10"))
+
 pwd_context = CryptContext(
     schemes = ["bcrypt"],
     deprecated = "auto"
 )
 
+_hash_executor = ThreadPoolExecutor(
+    max_workers = PASSWORD_HASH_WORKERS,
+    thread_name_prefix = "password-hash"
+)
+_hash_admission = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+
+class PasswordHasherBusy(Exception):
+    # raised when the hasher turns a caller away or does not answer in time
+    pass
+
+def _submit_hasher(fn, *args):
+    if not _hash_admission.acquire(blocking = False):
+        raise PasswordHasherBusy()
+
+    try:
+        future = _hash_executor.submit(fn, *args)
+    except Exception:
+        _hash_admission.release()
+        raise
+
+    future.add_done_callback(lambda _: _hash_admission.release())
+    return future
+
+def _wait_hasher(future):
+    try:
+        return future.result(timeout = PASSWORD_HASH_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        # still queued behind a full pool: give up the place in the queue
+        future.cancel()
+        raise PasswordHasherBusy() from None
+
+async def _wait_hasher_async(future):
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), PASSWORD_HASH_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise PasswordHasherBusy() from None
+
 def hash_password(plain_password : str) -> str:
-    return pwd_context.hash(plain_password)
+    return _wait_hasher(_submit_hasher(pwd_context.hash, plain_password))
 
 def verify_password(plain_password : str, hashed_password : str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _wait_hasher(_submit_hasher(pwd_context.verify, plain_password, hashed_password))
+
+async def hash_password_async(plain_password : str) -> str:
+    return await _wait_hasher_async(_submit_hasher(pwd_context.hash, plain_password))
+
+async def verify_password_async(plain_password : str, hashed_password : str) -> bool:
+    return await _wait_hasher_async(_submit_hasher(pwd_context.verify, plain_password, hashed_password))
 
 def create_access_token(data : dict, expires_delta : timedelta | None = None):
     to_encode = data.copy()
@@ -34,5 +87,8 @@ def create_access_token(data : dict, expires_delta : timedelta | None = None):
 def create_refresh_token() -> str:
     return secrets.token_urlsafe(64) # 64 bytes token str
 
+def token_digest(token : str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
 def get_refresh_token_expiry():
     return datetime.utcnow() + timedelta(days = REFRESH_TOKEN_EXPIRE_DAYS)
\ No newline at end of file
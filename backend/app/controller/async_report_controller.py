@@ -0,0 +1,102 @@
+from fastapi import HTTPException, status
+
+from app.services.async_report_service import (
+    create_report_service, get_my_reports, get_all_reports,
+    get_my_report_versions, get_all_report_versions,
+    get_my_report_rows, get_all_report_rows,
+    get_report_by_id, 
+    update_report, 
+    delete_report)
+from app.services.async_report_search_service import search_reports
+from app.controller.report_controller import report_response, report_versions, report_etag, report_page_etag
+from app.controller.report_controller import search_cursor, search_response
+from config.etag import versions_of, check_not_modified
+from config.validation import ReportInclude
+from config.serialization import FAST_JSON_ENABLED, row_items
+from app.schemas.report import REPORT_FIELDS
+
+# CREATE
+async def create_report_controller(db, payload, current_user):
+    return await create_report_service(db, payload, current_user.id)  
+
+# READ
+async def get_report_controller(db, current_user, limit, offset, after_id, include = None, if_none_match = None, fields = None):
+    if FAST_JSON_ENABLED and include is None:
+        # the rows are the body and their (id, version) the validator, one query either way
+        rows, next_cursor = await get_my_report_rows(db, current_user.id, limit, offset, after_id, fields or REPORT_FIELDS)
+        etag = report_page_etag("reports", versions_of(rows), next_cursor, fields = fields)
+        check_not_modified(if_none_match, etag)
+
+        return row_items(rows, fields or REPORT_FIELDS), next_cursor, etag
+
+    # a conditional request is answered from (id, version) alone when it can be;
+    # with columns included the validator needs the columns, so only the body is saved
+    if if_none_match and include is None:
+        versions, next_cursor = await get_my_report_versions(db, current_user.id, limit, offset, after_id)
+        check_not_modified(if_none_match, report_page_etag("reports", versions_of(versions), next_cursor, fields = fields))
+
+    reports, next_cursor = await get_my_reports(db, current_user.id, limit, offset, after_id, include == ReportInclude.columns, fields)
+    etag = report_page_etag("reports", [report_versions(report, include) for report in reports], next_cursor, include, fields)
+    check_not_modified(if_none_match, etag)
+
+    return [report_response(report, include, fields) for report in reports], next_cursor, etag
+
+async def get_all_reports_controller(db, limit, offset, after_id, if_none_match = None):
+    if FAST_JSON_ENABLED:
+        rows, next_cursor = await get_all_report_rows(db, limit, offset, after_id, REPORT_FIELDS)
+        etag = report_page_etag("all-reports", versions_of(rows), next_cursor)
+        check_not_modified(if_none_match, etag)
+
+        return row_items(rows, REPORT_FIELDS), next_cursor, etag
+
+    if if_none_match:
+        versions, next_cursor = await get_all_report_versions(db, limit, offset, after_id)
+        check_not_modified(if_none_match, report_page_etag("all-reports", versions_of(versions), next_cursor))
+
+    reports, next_cursor = await get_all_reports(db, limit, offset, after_id)
+    etag = report_page_etag("all-reports", versions_of(reports), next_cursor)
+
+    return reports, next_cursor, etag
+
+async def search_reports_controller(db, current_user, q, limit, cursor):
+    results, next_cursor = await search_reports(db, current_user.id, q, limit, search_cursor(cursor))
+    return search_response(results), next_cursor
+
+async def get_report_by_id_controller(db, current_user, report_id, include = None, if_none_match = None):
+    report = await get_report_by_id(db, current_user, report_id, include == ReportInclude.columns)
+    if not report:
+        raise HTTPException(
+            status_code = status.HTTP_404_NOT_FOUND,
+            detail = "Report not Found"
+        )
+
+    etag = report_etag(report, include)
+    check_not_modified(if_none_match, etag)
+
+    return report_response(report, include), etag
+
+# UPDATE
+async def update_report_controller(db, report_id, current_user, payload):
+    report = await update_report(db, report_id, current_user.id, payload)
+
+    if report is None:
+        raise HTTPException(
+            status_code = status.HTTP_404_NOT_FOUND,
+            detail = "Report not Found"
+        )
+    
+    return report
+
+# DELETE
+async def delete_report_controller(db, report_id, current_user):
+    report = await delete_report(db, report_id, current_user.id)
+
+    if report == "NO REPORT":
+        raise HTTPException(
+            status_code = status.HTTP_404_NOT_FOUND,
+            detail = "Report not Found"
+        )
+    
+    return {
+        "detail" : "Report deleted successfully"
+    }
@@ -3,11 +3,18 @@ from fastapi import HTTPException, status
 from app.services.report_column_service import (
     create_report_column, 
     read_report_column,
+    read_report_column_versions,
+    read_report_column_rows,
     get_report_column_by_id,
     update_report_column,
-    delete_report_column
+    delete_report_column,
+    batch_report_columns,
+    MissingColumnsError
 )
 from config.utils import get_owned_column
+from config.etag import make_etag, versions_of, check_not_modified
+from config.serialization import FAST_JSON_ENABLED, row_items
+from app.schemas.report import REPORT_COLUMN_FIELDS
 
 # CREATE
 def create_report_column_controller(db, payload, current_user, report_id):
@@ -22,18 +29,37 @@ def create_report_column_controller(db, payload, current_user, report_id):
     return column
 
 # READ
-def read_report_column_controller(db, report_id, current_user, limit, offset):
-    report_column = read_report_column(db, report_id, current_user.id, limit, offset)
+def read_report_column_controller(db, report_id, current_user, limit, offset, after_id, if_none_match = None, fields = None):
+    if FAST_JSON_ENABLED:
+        report_column = read_report_column_rows(db, report_id, current_user.id, limit, offset, after_id, fields or REPORT_COLUMN_FIELDS)
+    else:
+        if if_none_match:
+            versions = read_report_column_versions(db, report_id, current_user.id, limit, offset, after_id)
+
+            if versions is not None:
+                check_not_modified(if_none_match, make_etag("columns", report_id, fields, versions_of(versions[0]), versions[1]))
+
+        report_column = read_report_column(db, report_id, current_user.id, limit, offset, after_id, fields)
 
     if report_column is None:
         raise HTTPException(
             status_code = status.HTTP_404_NOT_FOUND,
             detail = "Report column not found"
         )
-    
-    return report_column
 
-def read_report_column_by_id_controller(db, report_id, column_id, current_user):
+    columns, next_cursor = report_column
+    etag = make_etag("columns", report_id, fields, versions_of(columns), next_cursor)
+    check_not_modified(if_none_match, etag)
+
+    if FAST_JSON_ENABLED:
+        return row_items(columns, fields or REPORT_COLUMN_FIELDS), next_cursor, etag
+
+    if fields is not None:
+        columns = [{name : getattr(column, name) for name in fields} for column in columns]
+
+    return columns, next_cursor, etag
+
+def read_report_column_by_id_controller(db, report_id, column_id, current_user, if_none_match = None):
     report_column = get_report_column_by_id(db, report_id, current_user.id, column_id)
 
     if report_column is None:
@@ -41,8 +67,11 @@ def read_report_column_by_id_controller(db, report_id, column_id, current_user):
             status_code = status.HTTP_404_NOT_FOUND,
             detail = "Report column not found"
         )
-    
-    return report_column
+
+    etag = make_etag("column", report_column.id, report_column.version)
+    check_not_modified(if_none_match, etag)
+
+    return report_column, etag
 
 # UPDATE
 def update_report_column_controller(db, payload, report_id, column_id, current_user):
@@ -71,3 +100,22 @@ def delete_report_column_controller(db, report_id, column_id, current_user):
     return {
         "detail" : "Report Column successfully deleted"
     }
+
+# BATCH
+def batch_report_columns_controller(db, report_id, current_user, payload):
+    try:
+        result = batch_report_columns(db, report_id, current_user.id, payload)
+    except MissingColumnsError as exc:
+        raise HTTPException(
+            status_code = status.HTTP_404_NOT_FOUND,
+            detail = str(exc)
+        )
+
+    if result is None:
+        raise HTTPException(
+            status_code = status.HTTP_404_NOT_FOUND,
+            detail = "Report not found"
+        )
+
+    return result
+
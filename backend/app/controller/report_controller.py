@@ -1,27 +1,139 @@
 from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
 
 from app.services.report_service import (
-    create_report_service, get_my_reports, 
+    create_report_service, get_my_reports, get_all_reports,
+    get_my_report_versions, get_all_report_versions,
+    get_my_report_rows, get_all_report_rows,
     get_report_by_id, 
     update_report, 
     delete_report)
+from app.services.report_execution_service import run_report, ColumnQueryError
+from config.singleflight import SingleFlightTimeout
+from app.services.report_export_service import export_report
+from app.services.report_scheduler_service import rebuild_report
+from app.services.report_search_service import search_reports
+from app.services.report_results_service import read_report_results, ResultQueryError
+from app.schemas.report import ReportRunRequest, ReportResponse, ReportWithColumnsResponse, ReportSearchResponse
+from app.schemas.report import ReportColumnResponse, REPORT_FIELDS
+from config.validation import ExportFormat, ReportInclude
+from config.etag import make_etag, versions_of, check_not_modified
+from config.utils import decode_rank_cursor, decode_offset_cursor
+from config.serialization import FAST_JSON_ENABLED, row_items
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.csv : "text/csv",
+    ExportFormat.ndjson : "application/x-ndjson"
+}
 
 # CREATE
 def create_report_controller(db, payload, current_user):
     return create_report_service(db, payload, current_user.id)  
 
+def report_response(report, include, fields = None):
+    # validated here so the response model never lazy-loads columns it was not asked for
+    if fields is not None:
+        return selected_fields(report, fields, include)
+    if include == ReportInclude.columns:
+        return ReportWithColumnsResponse.model_validate(report)
+    return ReportResponse.model_validate(report)
+
+def selected_fields(report, fields, include = None):
+    # only loaded attributes are read, see load_fields()
+    data = {name : getattr(report, name) for name in fields}
+
+    if include == ReportInclude.columns:
+        data["columns"] = [ReportColumnResponse.model_validate(column) for column in report.columns]
+
+    return data
+
+def report_versions(report, include):
+    if include == ReportInclude.columns:
+        return (report.id, report.version, versions_of(report.columns))
+    return (report.id, report.version)
+
+def report_etag(report, include):
+    return make_etag("report", include, report_versions(report, include))
+
+def report_page_etag(kind, versions, next_cursor, include = None, fields = None):
+    # versions: report_versions() of each report on the page, in page order
+    return make_etag(kind, include, fields, versions, next_cursor)
+
 # READ
-def get_report_controller(db, current_user, limit, offset):
-    return get_my_reports(db, current_user.id, limit, offset)
+def get_report_controller(db, current_user, limit, offset, after_id, include = None, if_none_match = None, fields = None):
+    if FAST_JSON_ENABLED and include is None:
+        # the rows are the body and their (id, version) the validator, one query either way
+        rows, next_cursor = get_my_report_rows(db, current_user.id, limit, offset, after_id, fields or REPORT_FIELDS)
+        etag = report_page_etag("reports", versions_of(rows), next_cursor, fields = fields)
+        check_not_modified(if_none_match, etag)
+
+        return row_items(rows, fields or REPORT_FIELDS), next_cursor, etag
+
+    # a conditional request is answered from (id, version) alone when it can be;
+    # with columns included the validator needs the columns, so only the body is saved
+    if if_none_match and include is None:
+        versions, next_cursor = get_my_report_versions(db, current_user.id, limit, offset, after_id)
+        check_not_modified(if_none_match, report_page_etag("reports", versions_of(versions), next_cursor, fields = fields))
+
+    reports, next_cursor = get_my_reports(db, current_user.id, limit, offset, after_id, include == ReportInclude.columns, fields)
+    etag = report_page_etag("reports", [report_versions(report, include) for report in reports], next_cursor, include, fields)
+    check_not_modified(if_none_match, etag)
+
+    return [report_response(report, include, fields) for report in reports], next_cursor, etag
+
+def get_all_reports_controller(db, limit, offset, after_id, if_none_match = None):
+    if FAST_JSON_ENABLED:
+        rows, next_cursor = get_all_report_rows(db, limit, offset, after_id, REPORT_FIELDS)
+        etag = report_page_etag("all-reports", versions_of(rows), next_cursor)
+        check_not_modified(if_none_match, etag)
+
+        return row_items(rows, REPORT_FIELDS), next_cursor, etag
+
+    if if_none_match:
+        versions, next_cursor = get_all_report_versions(db, limit, offset, after_id)
+        check_not_modified(if_none_match, report_page_etag("all-reports", versions_of(versions), next_cursor))
+
+    reports, next_cursor = get_all_reports(db, limit, offset, after_id)
+    etag = report_page_etag("all-reports", versions_of(reports), next_cursor)
+
+    return reports, next_cursor, etag
+
+def search_cursor(cursor):
+    if cursor is None:
+        return None
+
+    after = decode_rank_cursor(cursor)
+
+    if after is None:
+        raise HTTPException(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            detail = "Invalid cursor"
+        )
 
-def get_report_by_id_controller(db, current_user, report_id):
-    report = get_report_by_id(db, current_user, report_id)
+    return after
+
+def search_response(results):
+    return [
+        ReportSearchResponse(**ReportResponse.model_validate(report).model_dump(), score = score)
+        for report, score in results
+    ]
+
+def search_reports_controller(db, current_user, q, limit, cursor):
+    results, next_cursor = search_reports(db, current_user.id, q, limit, search_cursor(cursor))
+    return search_response(results), next_cursor
+
+def get_report_by_id_controller(db, current_user, report_id, include = None, if_none_match = None):
+    report = get_report_by_id(db, current_user, report_id, include == ReportInclude.columns)
     if not report:
         raise HTTPException(
             status_code = status.HTTP_404_NOT_FOUND,
             detail = "Report not Found"
         )
-    return report
+
+    etag = report_etag(report, include)
+    check_not_modified(if_none_match, etag)
+
+    return report_response(report, include), etag
 
 # UPDATE
 def update_report_controller(db, report_id, current_user, payload):
@@ -47,4 +159,129 @@ def delete_report_controller(db, report_id, current_user):
     
     return {
         "detail" : "Report deleted successfully"
-    }
\ No newline at end of file
+    }
+
+# RUN
+def run_report_controller(db, report_id, current_user, payload):
+    payload = payload or ReportRunRequest()
+
+    try:
+        result = run_report(db, report_id, current_user.id, payload.params, payload.columns, payload.at)
+    except SingleFlightTimeout as exc:
+        raise HTTPException(
+            status_code = status.HTTP_504_GATEWAY_TIMEOUT,
+            detail = str(exc)
+        )
+
+    if result is None:
+        raise HTTPException(
+            status_code = status.HTTP_404_NOT_FOUND,
+            detail = "Report not Found"
+        )
+
+    if result == "NO RESULT":
+        raise HTTPException(
+            status_code = status.HTTP_404_NOT_FOUND,
+            detail = "No stored result for that interval"
+        )
+    
+    return result
+
+# EXPORT
+def export_report_controller(db, report_id, current_user, export_format):
+    try:
+        exported = export_report(db, report_id, current_user.id, export_format)
+    except ColumnQueryError as exc:
+        raise HTTPException(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            detail = str(exc)
+        )
+
+    if exported is None:
+        raise HTTPException(
+            status_code = status.HTTP_404_NOT_FOUND,
+            detail = "Report not Found"
+        )
+
+    slug, body = exported
+
+    return StreamingResponse(
+        body,
+        media_type = EXPORT_MEDIA_TYPES[export_format],
+        headers = {
+            "Content-Disposition" : f'attachment; filename="{slug}.{export_format.value}"'
+        }
+    )
+
+# REBUILD
+def rebuild_report_controller(db, report_id, current_user):
+    result = rebuild_report(db, report_id, current_user.id)
+
+    if result is None:
+        raise HTTPException(
+            status_code = status.HTTP_404_NOT_FOUND,
+            detail = "Report not Found"
+        )
+
+    if result == "NOT CACHED":
+        raise HTTPException(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            detail = "Only cached reports can be rebuilt"
+        )
+
+    return result
+
+# RESULTS
+def get_report_results_controller(db, report_id, current_user, limit, cursor = None, sort = None, filters = None, columns = None, at = None, if_none_match = None):
+    after = None
+
+    if cursor is not None:
+        after = decode_offset_cursor(cursor)
+
+        if after is None:
+            raise HTTPException(
+                status_code = status.HTTP_400_BAD_REQUEST,
+                detail = "Invalid cursor"
+            )
+
+    if columns is not None:
+        columns = [name.strip() for name in columns.split(",") if name.strip()]
+
+    try:
+        results = read_report_results(db, report_id, current_user.id, limit, after, sort, filters, columns, at)
+    except ResultQueryError as exc:
+        raise HTTPException(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            detail = str(exc)
+        )
+
+    if results is None:
+        raise HTTPException(
+            status_code = status.HTTP_404_NOT_FOUND,
+            detail = "Report not Found"
+        )
+
+    if results == "NOT CACHED":
+        raise HTTPException(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            detail = "Only cached reports have stored results"
+        )
+
+    if results == "NO RESULT":
+        raise HTTPException(
+            status_code = status.HTTP_404_NOT_FOUND,
+            detail = "No stored result for that interval"
+        )
+
+    if results == "STALE CURSOR":
+        raise HTTPException(
+            status_code = status.HTTP_409_CONFLICT,
+            detail = "The stored result or its sort and filters changed since this cursor was issued"
+        )
+
+    page, next_cursor, view = results
+
+    etag = make_etag("results", report_id, view, after, limit, columns)
+    check_not_modified(if_none_match, etag)
+
+    return page, next_cursor, etag
@@ -1,12 +1,15 @@
 from config.database import Base 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BINARY, LargeBinary, DateTime, ForeignKey
 from datetime import datetime
 
 class RefreshToken(Base):
     __tablename__ = "refresh_token"
 
     id = Column(Integer, primary_key = True, index = True)
-    token = Column(String(512), nullable = False, unique = True)
+    # SHA-256 of the token; the raw token is only ever held by the client.
+    # Fixed-length BINARY(32), MySQL will not index a BLOB without a prefix;
+    # PostgreSQL has no BINARY and keeps BYTEA.
+    token_hash = Column(BINARY(32).with_variant(LargeBinary(), "postgresql"), nullable = False, unique = True)
     user_id = Column(
         Integer,
         ForeignKey("users.id", ondelete = "CASCADE"), 
@@ -14,5 +17,5 @@ class RefreshToken(Base):
         index = True
     )
 
-    expires_at = Column(DateTime, nullable = False)
+    expires_at = Column(DateTime, nullable = False, index = True)
     created_at = Column(DateTime, nullable = False, default = datetime.utcnow)
\ No newline at end of file
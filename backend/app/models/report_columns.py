@@ -1,12 +1,17 @@
 from config.database import Base 
-from sqlalchemy import Column, Integer, String, Text, JSON, ForeignKey 
+from datetime import datetime
+from sqlalchemy import Column, Integer, DateTime, String, Text, JSON, ForeignKey, Index
+from sqlalchemy.orm import relationship
 
 class ReportColumn(Base):
     __tablename__ = "report_columns"
+    __table_args__ = (
+        Index("ix_report_columns_report_id_id", "report_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
-    report_id = Column(Integer, ForeignKey("reports.id", ondelete = "CASCADE"), nullable = False, index = True) 
+    report_id = Column(Integer, ForeignKey("reports.id", ondelete = "CASCADE"), nullable = False) 
 
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
@@ -15,4 +20,11 @@ class ReportColumn(Base):
     query = Column(Text)
     
     connection_id = Column(String(255))
+    # output column of query that never decreases (timestamp, id), values may
+    # repeat; enables incremental refresh
+    watermark_column = Column(String(255), nullable = True)
 
+    version = Column(Integer, nullable = False, default = 1, server_default = "1")
+    updated_at = Column(DateTime, default = datetime.utcnow, onupdate = datetime.utcnow)
+
+    report = relationship("Reports", back_populates = "columns")
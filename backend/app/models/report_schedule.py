@@ -0,0 +1,13 @@
+from config.database import Base 
+from sqlalchemy import Column, Integer, DateTime, String, Text, ForeignKey
+
+class ReportSchedule(Base):
+    __tablename__ = "report_schedules"
+
+    report_id = Column(Integer, ForeignKey("reports.id", ondelete = "CASCADE"), primary_key = True)
+
+    next_run_at = Column(DateTime, nullable = False, index = True)
+    last_run_at = Column(DateTime, nullable = True)
+
+    last_status = Column(String(50), nullable = True) # ok | error
+    last_error = Column(Text, nullable = True)
@@ -1,14 +1,19 @@
 from config.database import Base 
 
-from sqlalchemy import Column, Integer, DateTime, String, Text, JSON, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, String, Text, JSON, ForeignKey, Index
+from sqlalchemy.orm import relationship
 from datetime import datetime
 
 class Reports(Base):
     __tablename__ = "reports"
+    __table_args__ = (
+        # keyset pagination of a user's reports: WHERE user_id = ? AND id < ? ORDER BY id DESC
+        Index("ix_reports_user_id_id", "user_id", "id"),
+    )
 
     id = Column(Integer, primary_key = True, index = True)
 
-    user_id = Column(Integer, ForeignKey("users.id", ondelete = "CASCADE"), nullable = False, index = True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete = "CASCADE"), nullable = False)
 
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable = True)
@@ -20,4 +25,17 @@ class Reports(Base):
     slug = Column(String(255), unique=True, index=True)
     params = Column(JSON, nullable=True)
 
-    created_at = Column(DateTime, default = datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default = datetime.utcnow)
+
+    # bumped on every write; together with id it is the ETag validator
+    version = Column(Integer, nullable = False, default = 1, server_default = "1")
+    updated_at = Column(DateTime, default = datetime.utcnow, onupdate = datetime.utcnow)
+
+    # the database cascades deletes, so unloaded columns are never fetched just to delete them
+    columns = relationship(
+        "ReportColumn",
+        back_populates = "report",
+        cascade = "all, delete-orphan",
+        passive_deletes = True,
+        order_by = "ReportColumn.id"
+    )
@@ -1,4 +1,5 @@
-from pydantic import BaseModel, ConfigDict, StringConstraints, Field
+from pydantic import BaseModel, ConfigDict, StringConstraints, Field, model_validator
+from datetime import datetime
 from typing import List, Optional, Dict, Any
 from typing_extensions import Annotated  
 from config.validation import (
@@ -17,6 +18,12 @@ NameStr = Annotated[
     StringConstraints(min_length = 3, max_length = 255)
 ]
 
+# a bare column name of the column query's output
+WatermarkStr = Annotated[
+    str,
+    StringConstraints(pattern = r"^[A-Za-z_][A-Za-z0-9_]*$", max_length = 255)
+]
+
 DescriptionStr = Annotated[
     str, 
     StringConstraints(max_length = 1000)
@@ -42,8 +49,13 @@ class ReportResponse(BaseModel):
 
     params : Optional[Dict[str, Any]] = None
 
+    version : int
+    updated_at : Optional[datetime] = None
+
     model_config = ConfigDict(from_attributes = True)
 
+REPORT_FIELDS = tuple(ReportResponse.model_fields)
+
 class ReportUpdate(BaseModel):
     title : Optional[TitleStr] = None  
     description : Optional[DescriptionStr] = None
@@ -60,6 +72,7 @@ class ReportColumnCreate(BaseModel):
     status : ReportStatus 
     query : Optional[str] = None 
     connection_id : str 
+    watermark_column : Optional[WatermarkStr] = None
 
 class ReportColumnUpdate(BaseModel):
     name : Optional[NameStr] = None
@@ -67,6 +80,7 @@ class ReportColumnUpdate(BaseModel):
     status : Optional[ReportStatus] = None 
     query : Optional[str] = None 
     connection_id : Optional[str] = None 
+    watermark_column : Optional[WatermarkStr] = None
 
 class ReportColumnResponse(BaseModel):
     id : int 
@@ -75,9 +89,93 @@ class ReportColumnResponse(BaseModel):
     status : ReportStatus
     query : Optional[str] = None 
     connection_id : Optional[str] = None 
+    watermark_column : Optional[str] = None
+
+    version : int
+    updated_at : Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes = True)
 
-    model_config = ConfigDict(from_attributes = True) 
+REPORT_COLUMN_FIELDS = tuple(ReportColumnResponse.model_fields)
 
-    
-    
-    
\ No newline at end of file
+class ReportSearchResponse(ReportResponse):
+    # relevance, higher is better; only comparable within one search
+    score : float
+
+class ReportColumnFieldsResponse(BaseModel):
+    # a ?fields= selection of ReportColumnResponse
+    id : Optional[int] = None
+    name : Optional[str] = None
+    description : Optional[str] = None
+    status : Optional[ReportStatus] = None
+    query : Optional[str] = None
+    connection_id : Optional[str] = None
+    watermark_column : Optional[str] = None
+
+    version : Optional[int] = None
+    updated_at : Optional[datetime] = None
+
+class ReportWithColumnsResponse(ReportResponse):
+    columns : List[ReportColumnResponse]
+
+class ReportFieldsResponse(BaseModel):
+    # a ?fields= selection of ReportResponse; unselected fields are left out
+    id : Optional[int] = None
+    title : Optional[str] = None
+    description : Optional[str] = None
+
+    type : Optional[ReportType] = None
+    interval : Optional[ReportInterval] = None
+    status : Optional[ReportStatus] = None
+    slug : Optional[str] = None
+
+    params : Optional[Dict[str, Any]] = None
+
+    version : Optional[int] = None
+    updated_at : Optional[datetime] = None
+
+    columns : Optional[List[ReportColumnResponse]] = None
+
+# Upper bound on operations of each kind in one batch request
+MAX_BATCH_OPERATIONS = 500
+
+class ReportColumnBatchUpdate(ReportColumnUpdate):
+    id : int
+
+class ReportColumnBatch(BaseModel):
+    create : List[ReportColumnCreate] = Field(default_factory = list, max_length = MAX_BATCH_OPERATIONS)
+    update : List[ReportColumnBatchUpdate] = Field(default_factory = list, max_length = MAX_BATCH_OPERATIONS)
+    delete : List[int] = Field(default_factory = list, max_length = MAX_BATCH_OPERATIONS)
+
+    @model_validator(mode = "after")
+    def check_unique_ids(self):
+        ids = [column.id for column in self.update] + self.delete
+
+        if len(ids) != len(set(ids)):
+            raise ValueError("Each column id may appear only once per batch")
+
+        return self
+
+class ReportColumnBatchResponse(BaseModel):
+    columns : List[ReportColumnResponse]
+    deleted : List[int]
+
+class ReportRunRequest(BaseModel):
+    params : Optional[Dict[str, Any]] = None
+    # only return these result columns
+    columns : Optional[List[str]] = None
+    # read the stored result of the bucket containing this time (cached reports)
+    at : Optional[datetime] = None
+
+class ReportRunResponse(BaseModel):
+    report_id : int
+    columns : List[str]
+    rows : List[Dict[str, Any]]
+    errors : Dict[str, str] = {}
+
+class ReportResultPageResponse(BaseModel):
+    report_id : int
+    columns : List[str]
+    rows : List[Dict[str, Any]]
+    # rows of the stored result matching the filters, across all pages
+    total : int
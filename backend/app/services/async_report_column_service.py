@@ -0,0 +1,154 @@
+from sqlalchemy import select, insert, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.concurrency import run_in_threadpool
+
+from app.models.report_columns import ReportColumn 
+from app.services.report_cache_service import invalidate_report_cache
+from app.services.report_column_service import apply_column_batch
+from config.utils import get_owned_report_async, keyset_page_async, bump_version, load_fields, row_columns
+
+# CREATE
+async def create_report_column(db : AsyncSession, payload, report_id : int, user_id : int):
+    report = await get_owned_report_async(db, report_id, user_id)
+
+    if not report:
+        return None 
+    
+    column = ReportColumn(
+        report_id = report.id,
+        **payload.dict()
+    )
+
+    db.add(column)
+    await db.commit()
+    await db.refresh(column)
+    await run_in_threadpool(invalidate_report_cache, column.report_id)
+
+    return column
+
+# READ
+async def read_report_column(db : AsyncSession, report_id : int, user_id : int, limit : int, offset : int, after_id = None, fields = None):
+    report = await get_owned_report_async(db, report_id, user_id)
+
+    if not report:
+        return None 
+    
+    statement = load_fields(select(ReportColumn).filter(
+        ReportColumn.report_id == report.id
+    ), ReportColumn, fields)
+
+    return await keyset_page_async(db, statement, ReportColumn.id, limit, offset, after_id)
+
+async def read_report_column_rows(db : AsyncSession, report_id : int, user_id : int, limit : int, offset : int, after_id = None, fields = ()):
+    report = await get_owned_report_async(db, report_id, user_id)
+
+    if not report:
+        return None
+
+    statement = select(*row_columns(ReportColumn, fields)).filter(
+        ReportColumn.report_id == report.id
+    )
+
+    return await keyset_page_async(db, statement, ReportColumn.id, limit, offset, after_id, scalars = False)
+
+async def read_report_column_versions(db : AsyncSession, report_id : int, user_id : int, limit : int, offset : int, after_id = None):
+    report = await get_owned_report_async(db, report_id, user_id)
+
+    if not report:
+        return None
+
+    statement = select(ReportColumn.id, ReportColumn.version).filter(
+        ReportColumn.report_id == report.id
+    )
+
+    return await keyset_page_async(db, statement, ReportColumn.id, limit, offset, after_id, scalars = False)
+
+async def get_report_column_by_id(db : AsyncSession, report_id : int, user_id : int, column_id : int):
+    report = await get_owned_report_async(db, report_id, user_id)
+
+    if not report:
+        return None 
+    
+    return (await db.execute(select(ReportColumn).filter(
+        ReportColumn.report_id == report_id,
+        ReportColumn.id == column_id
+    ))).scalars().first()
+
+# UPDATE
+async def update_report_column(db : AsyncSession, column, payload):
+    for key, value in payload.dict(exclude_unset = True).items():
+        setattr(column, key, value)
+    bump_version(column)
+    
+    await db.commit()
+    await db.refresh(column)
+    await run_in_threadpool(invalidate_report_cache, column.report_id)
+
+    return column
+
+# DELETE
+async def delete_report_column(db : AsyncSession, column):
+    report_id = column.report_id
+    await db.delete(column)
+    await db.commit()
+    await run_in_threadpool(invalidate_report_cache, report_id)
+
+# BATCH
+async def insert_columns(db : AsyncSession, rows):
+    if not rows:
+        return []
+
+    if db.get_bind().dialect.insert_returning:
+        return list(await db.scalars(insert(ReportColumn).returning(ReportColumn.id), rows))
+
+    columns = [ReportColumn(**row) for row in rows]
+    db.add_all(columns)
+    await db.flush()
+    return [column.id for column in columns]
+
+async def batch_report_columns(db : AsyncSession, report_id : int, user_id : int, payload):
+    report = await get_owned_report_async(db, report_id, user_id)
+
+    if not report:
+        return None
+
+    touched_ids = [column.id for column in payload.update] + payload.delete
+    existing = {
+        column.id : column
+        for column in (await db.execute(select(ReportColumn).filter(
+            ReportColumn.report_id == report.id,
+            ReportColumn.id.in_(touched_ids)
+        ))).scalars().all()
+    } if touched_ids else {}
+
+    report_id = report.id
+    new_rows = [{"report_id" : report_id, **column.dict()} for column in payload.create]
+
+    try:
+        apply_column_batch(existing, payload)
+        created_ids = await insert_columns(db, new_rows)
+
+        if payload.delete:
+            await db.execute(
+                delete(ReportColumn).where(ReportColumn.id.in_(payload.delete)),
+                execution_options = {"synchronize_session" : False}
+            )
+
+        await db.flush()
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    await run_in_threadpool(invalidate_report_cache, report_id)
+    result_ids = created_ids + [column.id for column in payload.update]
+
+    columns = (await db.execute(select(ReportColumn).filter(
+        ReportColumn.id.in_(result_ids)
+    ).order_by(ReportColumn.id).execution_options(populate_existing = True))).scalars().all() if result_ids else []
+
+    return {
+        "columns" : columns,
+        "deleted" : payload.delete
+    }
+
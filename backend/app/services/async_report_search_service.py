@@ -0,0 +1,13 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.report_search_service import search_page, search_statement, search_terms
+
+# SEARCH
+async def search_reports(db : AsyncSession, user_id : int, q : str, limit : int, after = None):
+    terms = search_terms(q)
+
+    if not terms:
+        return [], None
+
+    statement = search_statement(db.get_bind().dialect.name, user_id, terms, limit, after)
+    return search_page((await db.execute(statement)).all(), limit)
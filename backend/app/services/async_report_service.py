@@ -0,0 +1,91 @@
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.concurrency import run_in_threadpool
+
+from app.schemas.report import ReportCreate
+from app.models.reports import Reports
+from app.models.report_schedule import ReportSchedule
+from app.services.report_service import build_report, with_columns, SCHEDULE_FIELDS
+from app.services.report_cache_service import invalidate_report_cache, drop_report_cache
+from config.utils import keyset_page_async, bump_version, load_fields, row_columns
+from config.validation import UserRole
+
+def _owned_report(report_id : int, user_id : int):
+    return select(Reports).filter(
+        Reports.id == report_id,
+        Reports.user_id == user_id
+    )
+
+# CREATE
+async def create_report_service(db : AsyncSession, payload : ReportCreate, user_id : int):
+    report = build_report(payload, user_id)
+    db.add(report)
+    await db.commit()
+    await db.refresh(report)
+
+    return report
+
+# READ
+async def get_my_reports(db : AsyncSession, user_id : int, limit : int, offset : int, after_id : int | None = None, include_columns : bool = False, fields = None):
+    statement = with_columns(select(Reports).filter(Reports.user_id == user_id), include_columns)
+    statement = load_fields(statement, Reports, fields)
+    return await keyset_page_async(db, statement, Reports.id, limit, offset, after_id)
+
+async def get_all_reports(db : AsyncSession, limit : int, offset : int, after_id : int | None = None):
+    return await keyset_page_async(db, select(Reports), Reports.id, limit, offset, after_id)
+
+async def get_my_report_rows(db : AsyncSession, user_id : int, limit : int, offset : int, after_id : int | None = None, fields = ()):
+    statement = select(*row_columns(Reports, fields)).filter(Reports.user_id == user_id)
+    return await keyset_page_async(db, statement, Reports.id, limit, offset, after_id, scalars = False)
+
+async def get_all_report_rows(db : AsyncSession, limit : int, offset : int, after_id : int | None = None, fields = ()):
+    return await keyset_page_async(db, select(*row_columns(Reports, fields)), Reports.id, limit, offset, after_id, scalars = False)
+
+async def get_my_report_versions(db : AsyncSession, user_id : int, limit : int, offset : int, after_id : int | None = None):
+    statement = select(Reports.id, Reports.version).filter(Reports.user_id == user_id)
+    return await keyset_page_async(db, statement, Reports.id, limit, offset, after_id, scalars = False)
+
+async def get_all_report_versions(db : AsyncSession, limit : int, offset : int, after_id : int | None = None):
+    statement = select(Reports.id, Reports.version)
+    return await keyset_page_async(db, statement, Reports.id, limit, offset, after_id, scalars = False)
+
+async def get_report_by_id(db : AsyncSession, current_user, report_id : int, include_columns : bool = False):
+    statement = with_columns(select(Reports).filter(
+        Reports.id == report_id
+    ), include_columns)
+
+    if current_user.role != UserRole.admin:
+        statement = statement.filter(Reports.user_id == current_user.id)
+    
+    return (await db.execute(statement)).scalars().first()
+
+# UPDATE
+async def update_report(db : AsyncSession, report_id : int, user_id : int, payload):
+    report = (await db.execute(_owned_report(report_id, user_id))).scalars().first()
+    
+    if not report:
+        return None 
+    
+    changes = payload.dict(exclude_unset = True)
+    for key, value in changes.items():
+        setattr(report, key, value)
+    bump_version(report)
+
+    if changes.keys() & SCHEDULE_FIELDS:
+        await db.execute(delete(ReportSchedule).where(ReportSchedule.report_id == report.id))
+    
+    await db.commit()
+    await db.refresh(report)
+    await run_in_threadpool(invalidate_report_cache, report.id)
+    return report
+
+# DELETE
+async def delete_report(db : AsyncSession, report_id : int, user_id : int):
+    report = (await db.execute(_owned_report(report_id, user_id))).scalars().first()
+
+    if not report:
+        return "NO REPORT"
+
+    await db.delete(report)
+    await db.commit()
+    await run_in_threadpool(drop_report_cache, report_id)
@@ -0,0 +1,245 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from config.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# What happens to a column query whose plan fully scans a table of more than
+# QUERY_GUARD_MAX_SCAN_ROWS estimated rows: reject | flag (log only) | off
+QUERY_GUARD_ACTION = os.getenv("QUERY_GUARD_ACTION", "reject")
+QUERY_GUARD_MAX_SCAN_ROWS = int(os.getenv("QUERY_GUARD_MAX_SCAN_ROWS", "1000000"))
+# Cached verdicts, one per column version and statement
+QUERY_GUARD_CACHE_SIZE = int(os.getenv("QUERY_GUARD_CACHE_SIZE", "4096"))
+# Limits on every column query of a run or refresh; 0 disables either
+COLUMN_QUERY_TIMEOUT_SECONDS = float(os.getenv("COLUMN_QUERY_TIMEOUT_SECONDS", "30"))
+COLUMN_QUERY_MAX_ROWS = int(os.getenv("COLUMN_QUERY_MAX_ROWS", "100000"))
+# Exports stream every row, so they get a longer timeout of their own and no row cap
+EXPORT_QUERY_TIMEOUT_SECONDS = float(os.getenv("EXPORT_QUERY_TIMEOUT_SECONDS", "300"))
+
+# SQLite calls the progress handler every this many VM instructions
+_SQLITE_PROGRESS_STEPS = 10_000
+# what the servers raise when they cancel a statement for its timeout:
+# MySQL error ER_QUERY_TIMEOUT, PostgreSQL SQLSTATE query_canceled
+_MYSQL_QUERY_TIMEOUT = 3024
+_POSTGRESQL_QUERY_CANCELED = "57014"
+_SQLITE_TABLE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+# "FROM big b", "JOIN main.big AS b", ", big b": SQLite plans name the alias
+_SQL_TABLE_ALIAS = re.compile(
+    r'(?:\bfrom\b|\bjoin\b|,)\s*((?:"[^"]+"|\w+)(?:\.(?:"[^"]+"|\w+))?)\s+(?:as\s+)?(\w+)',
+    re.IGNORECASE
+)
+_SQL_KEYWORDS = {
+    "as", "cross", "except", "from", "full", "group", "having", "inner", "intersect", "join",
+    "left", "limit", "natural", "on", "order", "outer", "right", "select", "union", "using",
+    "where", "window"
+}
+
+_verdicts = OrderedDict()
+_verdicts_lock = threading.Lock()
+# concurrent runs of the same column version share one EXPLAIN
+_plan_flights = SingleFlight()
+
+class QueryRejectedError(Exception):
+    pass
+
+class QueryLimitError(Exception):
+    pass
+
+# PLAN: (table, estimated rows) of every full table scan; None when unknown
+def _mysql_full_scans(conn, query, params):
+    rows = conn.execute(text(f"EXPLAIN {query}"), params).mappings().all()
+    return [(row["table"], row["rows"]) for row in rows if row["type"] == "ALL"]
+
+def _postgresql_full_scans(conn, query, params):
+    # Plan Rows is the estimate after the scan's filter, so the table is sized
+    # from pg_class; it falls back to Plan Rows when never analyzed
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {query}"), params).scalar()
+    scans = []
+    nodes = [plan[0]["Plan"]]
+
+    while nodes:
+        node = nodes.pop()
+        if node.get("Node Type") == "Seq Scan":
+            table = node.get("Relation Name")
+            reltuples = conn.execute(
+                text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"),
+                {"name" : conn.dialect.identifier_preparer.quote(table)}
+            ).scalar()
+            estimate = int(reltuples) if reltuples is not None and reltuples >= 0 else node.get("Plan Rows")
+            scans.append((table, estimate))
+        nodes.extend(node.get("Plans", ()))
+
+    return scans
+
+def _sqlite_aliases(query):
+    # alias -> table as written in the query
+    return {
+        alias : table for table, alias in _SQL_TABLE_ALIAS.findall(query)
+        if alias.lower() not in _SQL_KEYWORDS
+    }
+
+def _sqlite_full_scans(conn, query, params):
+    # The plan carries no estimates; the largest rowid stands in for the row
+    # count. Names that are no table (CTEs, subqueries) stay unsized, the
+    # tables they read show up as scans of their own.
+    scans = []
+    aliases = _sqlite_aliases(query)
+    quote = conn.dialect.identifier_preparer.quote
+
+    for row in conn.execute(text(f"EXPLAIN QUERY PLAN {query}"), params):
+        match = _SQLITE_TABLE_SCAN.match(row[-1])
+
+        if not match or row[-1].startswith("SCAN CONSTANT ROW"):
+            continue
+
+        table = aliases.get(match.group(1), match.group(1))
+        name = ".".join(quote(part.strip('"')) for part in table.split("."))
+        try:
+            estimate = conn.execute(text(f"SELECT MAX(rowid) FROM {name}")).scalar() or 0
+        except Exception:
+            estimate = None
+        scans.append((table, estimate))
+
+    return scans
+
+_PLANNERS = {
+    "mysql" : _mysql_full_scans,
+    "postgresql" : _postgresql_full_scans,
+    "sqlite" : _sqlite_full_scans
+}
+
+def plan_verdict(conn, query, params):
+    # the full scans over the limit; empty when the plan could not be read
+    planner = _PLANNERS.get(conn.dialect.name)
+
+    if planner is None:
+        return []
+
+    return [
+        (table, rows) for table, rows in planner(conn, query, params)
+        if rows is not None and rows > QUERY_GUARD_MAX_SCAN_ROWS
+    ]
+
+def _cached_verdict(key):
+    with _verdicts_lock:
+        verdict = _verdicts.get(key)
+        if verdict is not None:
+            _verdicts.move_to_end(key)
+        return verdict
+
+def _store_verdict(key, verdict):
+    with _verdicts_lock:
+        _verdicts[key] = verdict
+        _verdicts.move_to_end(key)
+
+        while len(_verdicts) > QUERY_GUARD_CACHE_SIZE:
+            _verdicts.popitem(last = False)
+
+def _explain(key, job, conn, query, params):
+    try:
+        verdict = plan_verdict(conn, query, params)
+    except Exception as exc:
+        # a query that cannot be planned fails on its own when it runs;
+        # nothing is cached so the next run tries again
+        logger.info("could not EXPLAIN column %s: %s", job.id, exc)
+        return []
+
+    if verdict:
+        logger.warning("column %s (version %s) fully scans %s", job.id, job.version, verdict)
+
+    _store_verdict(key, verdict)
+    return verdict
+
+def check_column_query(job, conn, params, query = None):
+    # EXPLAINs the statement about to run, job.query unless another statement
+    # derived from it is given, once per column version on the connection
+    # that will run it; each statement has a verdict of its own
+    if QUERY_GUARD_ACTION == "off":
+        return
+
+    query = query or job.query
+    key = (job.id, job.version, query)
+    verdict = _cached_verdict(key)
+
+    if verdict is None:
+        verdict = _plan_flights.do(key, lambda: _explain(key, job, conn, query, params))
+
+    if verdict and QUERY_GUARD_ACTION == "reject":
+        scans = ", ".join(f"{table} (~{rows} rows)" for table, rows in verdict)
+        raise QueryRejectedError(
+            f"Rejected by the query guard: full scan of {scans} exceeds {QUERY_GUARD_MAX_SCAN_ROWS} rows"
+        )
+
+# EXECUTION
+def _timed_out(backend, exc, deadline):
+    # whether exc is the server cancelling the statement for its timeout
+    orig = getattr(exc, "orig", None) or exc
+
+    if backend == "mysql":
+        return bool(orig.args) and orig.args[0] == _MYSQL_QUERY_TIMEOUT
+    if backend == "postgresql":
+        # psycopg2 names the SQLSTATE pgcode, psycopg 3 sqlstate
+        return _POSTGRESQL_QUERY_CANCELED in (getattr(orig, "pgcode", None), getattr(orig, "sqlstate", None))
+    if backend == "sqlite":
+        # the progress handler aborts the statement as "interrupted"
+        return time.monotonic() > deadline and "interrupted" in str(orig)
+    return False
+
+@contextmanager
+def statement_timeout(conn, seconds : float):
+    # Every dialect reports a statement that ran out of time as a QueryLimitError
+    if not seconds:
+        yield
+        return
+
+    backend = conn.dialect.name
+    deadline = time.monotonic() + seconds
+    reset = None
+
+    if backend == "mysql":
+        # SELECTs only, which is all a column query may be
+        conn.execute(text(f"SET SESSION max_execution_time = {int(seconds * 1000)}"))
+        reset = lambda: conn.execute(text("SET SESSION max_execution_time = 0"))
+
+    elif backend == "postgresql":
+        # reset when the connection's transaction ends
+        conn.execute(text(f"SET LOCAL statement_timeout = {int(seconds * 1000)}"))
+
+    elif backend == "sqlite":
+        driver_connection = conn.connection.driver_connection
+        driver_connection.set_progress_handler(lambda: time.monotonic() > deadline, _SQLITE_PROGRESS_STEPS)
+        reset = lambda: driver_connection.set_progress_handler(None, 0)
+
+    try:
+        yield
+    except Exception as exc:
+        if _timed_out(backend, exc, deadline):
+            raise QueryLimitError(f"Column query exceeded the {seconds:g}s statement timeout") from exc
+        raise
+    finally:
+        if reset is not None:
+            reset()
+
+def fetch_column_rows(conn, statement, params):
+    # every row of one column query, within the statement timeout and row cap
+    with statement_timeout(conn, COLUMN_QUERY_TIMEOUT_SECONDS):
+        result = conn.execute(statement, params)
+
+        if not COLUMN_QUERY_MAX_ROWS:
+            return result.all()
+
+        rows = result.fetchmany(COLUMN_QUERY_MAX_ROWS + 1)
+        result.close()
+
+    if len(rows) > COLUMN_QUERY_MAX_ROWS:
+        raise QueryLimitError(f"Column query returned more than {COLUMN_QUERY_MAX_ROWS} rows")
+
+    return rows
@@ -0,0 +1,88 @@
+import os
+import json
+import logging
+from datetime import datetime
+
+from app.services.report_store_service import (
+    delete_stored_results,
+    discard_live_results,
+    read_stored_result,
+    write_stored_result
+)
+from config.cache import ResultCache
+from config.intervals import interval_bucket_start, next_interval_boundary
+from config.validation import ReportInterval
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "1024"))
+
+report_cache = ResultCache(REPORT_CACHE_MAX_ENTRIES)
+
+def params_key(params) -> str:
+    return json.dumps(params or {}, sort_keys = True, default = str)
+
+def result_version(report_version : int, jobs):
+    # Part of every cache key: an edit to the report or to any of its active
+    # columns changes it, so workers that never saw the invalidation stop
+    # matching their old entries too.
+    return (report_version, tuple((job.id, job.version) for job in jobs))
+
+def cache_key(report_id : int, params, interval, version, now : datetime | None = None):
+    bucket = interval_bucket_start(ReportInterval(interval), now)
+    return (report_id, params_key(params), bucket.isoformat(), version)
+
+def project_result(result, columns):
+    if columns is None:
+        return result
+
+    names = [name for name in columns if name in result["columns"]]
+    return {
+        **result,
+        "columns" : names,
+        "rows" : [{name : row[name] for name in names} for row in result["rows"]],
+        "errors" : {name : error for name, error in result["errors"].items() if name in names}
+    }
+
+def get_cached_result(report_id : int, params, interval, version, now : datetime | None = None, columns = None):
+    # memory first, then the materialized file of the same bucket
+    key = cache_key(report_id, params, interval, version, now)
+    result = report_cache.get(key, now)
+
+    if result is not None:
+        return project_result(result, columns)
+
+    bucket_start = interval_bucket_start(ReportInterval(interval), now)
+    # a file written under other versions is a miss, however it got there
+    result = read_stored_result(report_id, key[1], bucket_start, columns, version = version)
+
+    if result is not None and columns is None:
+        report_cache.set(key, result, next_interval_boundary(ReportInterval(interval), now))
+
+    return result
+
+def get_stored_result(report_id : int, params, interval, at : datetime, columns = None):
+    # past buckets are only ever served from storage
+    bucket_start = interval_bucket_start(ReportInterval(interval), at)
+    return read_stored_result(report_id, params_key(params), bucket_start, columns)
+
+def store_cached_result(report_id : int, params, interval, version, result, now : datetime | None = None):
+    # entries live until the end of the interval bucket they were computed for
+    key = cache_key(report_id, params, interval, version, now)
+    bucket_start = interval_bucket_start(ReportInterval(interval), now)
+    bucket_end = next_interval_boundary(ReportInterval(interval), now)
+
+    report_cache.set(key, result, bucket_end)
+
+    try:
+        write_stored_result(report_id, key[1], bucket_start, bucket_end, result, version)
+    except Exception:
+        logger.exception("Could not materialize result of report %s", report_id)
+
+def invalidate_report_cache(report_id : int):
+    report_cache.invalidate_report(report_id)
+    discard_live_results(report_id)
+
+def drop_report_cache(report_id : int):
+    report_cache.invalidate_report(report_id)
+    delete_stored_results(report_id)
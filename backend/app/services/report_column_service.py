@@ -1,5 +1,7 @@
-from config.utils import get_owned_report
+from sqlalchemy import insert
+from config.utils import get_owned_report, keyset_page, bump_version, load_fields, row_columns
 from app.models.report_columns import ReportColumn 
+from app.services.report_cache_service import invalidate_report_cache
 
 # CREATE
 def create_report_column(db, payload, report_id, user_id):
@@ -16,21 +18,46 @@ def create_report_column(db, payload, report_id, user_id):
     db.add(column)
     db.commit()
     db.refresh(column)
+    invalidate_report_cache(column.report_id)
 
     return column
 
 # READ
-def read_report_column(db, report_id, user_id, limit, offset):
+def read_report_column(db, report_id, user_id, limit, offset, after_id = None, fields = None):
     report = get_owned_report(db, report_id, user_id)
 
     if not report:
         return None 
     
-    report_column = db.query(ReportColumn).filter(
+    query = load_fields(db.query(ReportColumn).filter(
         ReportColumn.report_id == report.id
-    ).order_by(ReportColumn.id.desc()).offset(offset).limit(limit).all()
+    ), ReportColumn, fields)
 
-    return report_column
+    return keyset_page(query, ReportColumn.id, limit, offset, after_id)
+
+def read_report_column_rows(db, report_id, user_id, limit, offset, after_id = None, fields = ()):
+    report = get_owned_report(db, report_id, user_id)
+
+    if not report:
+        return None
+
+    query = db.query(*row_columns(ReportColumn, fields)).filter(
+        ReportColumn.report_id == report.id
+    )
+
+    return keyset_page(query, ReportColumn.id, limit, offset, after_id)
+
+def read_report_column_versions(db, report_id, user_id, limit, offset, after_id = None):
+    report = get_owned_report(db, report_id, user_id)
+
+    if not report:
+        return None
+
+    query = db.query(ReportColumn.id, ReportColumn.version).filter(
+        ReportColumn.report_id == report.id
+    )
+
+    return keyset_page(query, ReportColumn.id, limit, offset, after_id)
 
 def get_report_column_by_id(db, report_id, user_id, column_id):
     report = get_owned_report(db, report_id, user_id)
@@ -49,13 +76,98 @@ def get_report_column_by_id(db, report_id, user_id, column_id):
 def update_report_column(db, column, payload):
     for key, value in payload.dict(exclude_unset = True).items():
         setattr(column, key, value)
+    bump_version(column)
     
     db.commit()
     db.refresh(column)
+    invalidate_report_cache(column.report_id)
 
     return column
 
 # DELETE
 def delete_report_column(db, column):
+    report_id = column.report_id
     db.delete(column)
     db.commit()
+    invalidate_report_cache(report_id)
+
+# BATCH
+class MissingColumnsError(Exception):
+    def __init__(self, column_ids):
+        super().__init__(f"Report columns not found: {column_ids}")
+        self.column_ids = column_ids
+
+def apply_column_batch(existing, payload):
+    # Applies the updates to the already loaded columns; inserts and deletes
+    # are issued by the caller as single statements.
+    requested = {column.id for column in payload.update} | set(payload.delete)
+    missing = sorted(requested - existing.keys())
+
+    if missing:
+        raise MissingColumnsError(missing)
+
+    for column_update in payload.update:
+        column = existing[column_update.id]
+        for key, value in column_update.dict(exclude_unset = True, exclude = {"id"}).items():
+            setattr(column, key, value)
+        bump_version(column)
+
+def insert_columns(db, rows):
+    if not rows:
+        return []
+
+    # one multi-row INSERT ... RETURNING where the dialect supports it;
+    # otherwise the ORM falls back to one INSERT per row to learn the ids
+    if db.get_bind().dialect.insert_returning:
+        return list(db.scalars(insert(ReportColumn).returning(ReportColumn.id), rows))
+
+    columns = [ReportColumn(**row) for row in rows]
+    db.add_all(columns)
+    db.flush()
+    return [column.id for column in columns]
+
+def batch_report_columns(db, report_id, user_id, payload):
+    report = get_owned_report(db, report_id, user_id)
+
+    if not report:
+        return None
+
+    touched_ids = [column.id for column in payload.update] + payload.delete
+    existing = {
+        column.id : column
+        for column in db.query(ReportColumn).filter(
+            ReportColumn.report_id == report.id,
+            ReportColumn.id.in_(touched_ids)
+        ).all()
+    } if touched_ids else {}
+
+    report_id = report.id
+    new_rows = [{"report_id" : report_id, **column.dict()} for column in payload.create]
+
+    try:
+        apply_column_batch(existing, payload)
+        created_ids = insert_columns(db, new_rows)
+
+        if payload.delete:
+            db.query(ReportColumn).filter(
+                ReportColumn.id.in_(payload.delete)
+            ).delete(synchronize_session = False)
+
+        db.flush()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    invalidate_report_cache(report_id)
+    result_ids = created_ids + [column.id for column in payload.update]
+
+    columns = db.query(ReportColumn).filter(
+        ReportColumn.id.in_(result_ids)
+    ).order_by(ReportColumn.id).all() if result_ids else []
+
+    return {
+        "columns" : columns,
+        "deleted" : payload.delete
+    }
+
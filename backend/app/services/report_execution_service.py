@@ -0,0 +1,215 @@
+import os
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from itertools import zip_longest
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.report_columns import ReportColumn
+from app.services.report_cache_service import (
+    get_cached_result,
+    get_stored_result,
+    params_key,
+    project_result,
+    result_version,
+    store_cached_result
+)
+from app.services.query_guard_service import check_column_query, fetch_column_rows
+from config.connections import get_connection_engine
+from config.singleflight import SingleFlight
+from config.utils import get_owned_report
+from config.validation import ReportStatus, ReportType
+
+# Overall cap on column queries in flight across all reports
+REPORT_MAX_WORKERS = int(os.getenv("REPORT_MAX_WORKERS", "16"))
+# Cap per source connection so one report cannot monopolise a database
+REPORT_MAX_PER_CONNECTION = int(os.getenv("REPORT_MAX_PER_CONNECTION", "4"))
+# How long a caller waits on an identical run already in flight
+REPORT_RUN_WAIT_SECONDS = float(os.getenv("REPORT_RUN_WAIT_SECONDS", "60"))
+
+ColumnJob = namedtuple("ColumnJob", ["id", "name", "query", "connection_id", "watermark_column", "version"])
+
+_executor = ThreadPoolExecutor(
+    max_workers = REPORT_MAX_WORKERS,
+    thread_name_prefix = "report-run"
+)
+
+_connection_slots = {}
+_connection_slots_lock = threading.Lock()
+
+# identical concurrent runs share one execution against the sources
+report_flights = SingleFlight()
+
+class ColumnQueryError(Exception):
+    def __init__(self, column_name, error):
+        super().__init__(f"Column '{column_name}' failed: {error}")
+        self.column_name = column_name
+
+def query_error_message(exc):
+    return str(getattr(exc, "orig", None) or exc)
+
+def _get_connection_slot(connection_id):
+    with _connection_slots_lock:
+        slot = _connection_slots.get(connection_id)
+
+        if slot is None:
+            slot = threading.BoundedSemaphore(REPORT_MAX_PER_CONNECTION)
+            _connection_slots[connection_id] = slot
+
+    return slot
+
+def run_column(job, params):
+    try:
+        engine = get_connection_engine(job.connection_id)
+
+        with engine.connect() as conn:
+            check_column_query(job, conn, params)
+            # each column query yields the values of one report column
+            values = [row[0] for row in fetch_column_rows(conn, text(job.query), params)]
+        error = None
+    except Exception as exc:
+        values = []
+        error = query_error_message(exc)
+
+    return {
+        "column_id" : job.id,
+        "name" : job.name,
+        "values" : values,
+        "error" : error
+    }
+
+def _run_lane(pending, params, results, runner):
+    # A lane drains the queued columns of one connection one at a time, so a
+    # report never holds more workers for a connection than it has slots.
+    while True:
+        try:
+            job = pending.popleft()
+        except IndexError:
+            return
+
+        with _get_connection_slot(job.connection_id):
+            results[job.id] = runner(job, params)
+
+def result_column_names(columns):
+    # columns: (column_id, name) pairs; duplicate names get the id appended
+    names = []
+    seen = set()
+
+    for column_id, name in columns:
+        if name in seen:
+            name = f"{name}_{column_id}"
+        seen.add(name)
+        names.append(name)
+
+    return names
+
+def merge_column_results(column_results):
+    names = result_column_names(
+        (result["column_id"], result["name"]) for result in column_results
+    )
+
+    rows = [
+        dict(zip(names, values))
+        for values in zip_longest(*[result["values"] for result in column_results])
+    ]
+
+    errors = {
+        name : result["error"]
+        for name, result in zip(names, column_results)
+        if result["error"] is not None
+    }
+
+    return {
+        "columns" : names,
+        "rows" : rows,
+        "errors" : errors
+    }
+
+def start_columns(jobs, params, runner = run_column):
+    # Queues the lanes of jobs without waiting for them: (lane futures,
+    # results by column id, filled in as each column finishes).
+    lanes = {}
+    for job in jobs:
+        lanes.setdefault(job.connection_id, deque()).append(job)
+
+    results = {}
+    futures = [
+        _executor.submit(_run_lane, pending, params, results, runner)
+        for pending in lanes.values()
+        for _ in range(min(REPORT_MAX_PER_CONNECTION, len(pending)))
+    ]
+
+    return futures, results
+
+def run_columns(jobs, params, runner = run_column):
+    # per-column results in job order; runner(job, params) runs one column
+    futures, results = start_columns(jobs, params, runner)
+    wait(futures)
+
+    return [results[job.id] for job in jobs]
+
+def execute_columns(jobs, params):
+    return merge_column_results(run_columns(jobs, params))
+
+def get_active_column_jobs(db : Session, report_id : int):
+    columns = db.query(
+        ReportColumn.id,
+        ReportColumn.name,
+        ReportColumn.query,
+        ReportColumn.connection_id,
+        ReportColumn.watermark_column,
+        ReportColumn.version
+    ).filter(
+        ReportColumn.report_id == report_id,
+        ReportColumn.status == ReportStatus.active.value,
+        ReportColumn.query.isnot(None)
+    ).order_by(ReportColumn.id).all()
+
+    return [ColumnJob(*column) for column in columns]
+
+# RUN
+def run_report(db : Session, report_id : int, user_id : int, params = None, columns = None, at = None):
+    report = get_owned_report(db, report_id, user_id)
+
+    if not report:
+        return None
+
+    merged_params = {**(report.params or {}), **(params or {})}
+    is_cached = report.type == ReportType.cached
+
+    if is_cached and at is not None:
+        result = get_stored_result(report.id, merged_params, report.interval, at, columns)
+        return result if result is not None else "NO RESULT"
+
+    jobs = get_active_column_jobs(db, report.id)
+    version = result_version(report.version, jobs)
+
+    if is_cached:
+        result = get_cached_result(report.id, merged_params, report.interval, version, columns = columns)
+        if result is not None:
+            return result
+
+    # the jobs themselves are part of the key, so an edited column never joins
+    # a run of its old query; projection happens per caller afterwards
+    key = (report.id, params_key(merged_params), tuple(jobs))
+    interval = report.interval if is_cached else None
+
+    result = report_flights.do(
+        key,
+        lambda: _execute_report(key[0], jobs, merged_params, interval, version),
+        REPORT_RUN_WAIT_SECONDS
+    )
+
+    return project_result(result, columns)
+
+def _execute_report(report_id, jobs, params, interval, version):
+    result = execute_columns(jobs, params)
+    result["report_id"] = report_id
+
+    # partial failures are served but never pinned for a whole interval
+    if interval is not None and not result["errors"]:
+        store_cached_result(report_id, params, interval, version, result)
+
+    return result
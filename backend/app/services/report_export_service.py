@@ -0,0 +1,212 @@
+import io
+import os
+import csv
+import json
+import pickle
+import tempfile
+import threading
+from itertools import islice, zip_longest
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services.report_execution_service import (
+    ColumnQueryError,
+    get_active_column_jobs,
+    query_error_message,
+    result_column_names,
+    start_columns
+)
+from app.services.report_cache_service import params_key, result_version
+from app.services.report_store_service import open_stored_table
+from app.services.query_guard_service import check_column_query, statement_timeout, EXPORT_QUERY_TIMEOUT_SECONDS
+from config.connections import get_connection_engine
+from config.intervals import interval_bucket_start
+from config.utils import get_owned_report
+from config.validation import ExportFormat, ReportInterval, ReportType
+
+# Rows fetched per round trip from the server-side cursors, and per streamed batch
+EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "1000"))
+# Rows encoded into one chunk of the streamed response body
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "500"))
+
+class ExportClosed(Exception):
+    pass
+
+class ColumnStream:
+    # The batches of one column, readable while its query is still running.
+    # The reading thread appends to a temporary file and never waits on the
+    # response, so a column holds its source connection only for its own
+    # query however slowly the client reads, and a report with more columns
+    # than connection slots still streams once earlier columns finish.
+
+    def __init__(self, name : str):
+        self.name = name
+        self.error = None
+        self._file = tempfile.TemporaryFile()
+        self._cond = threading.Condition()
+        self._written = 0
+        self._read = 0
+        self._read_offset = 0
+        self._done = False
+        self._closed = False
+
+    def append(self, values):
+        with self._cond:
+            if self._closed:
+                raise ExportClosed()
+
+            self._file.seek(0, io.SEEK_END)
+            pickle.dump(values, self._file)
+            self._written += 1
+            self._cond.notify_all()
+
+    def finish(self, error = None):
+        with self._cond:
+            self.error = error
+            self._done = True
+            self._cond.notify_all()
+
+    def wait_started(self):
+        # blocks until the first batch is read or the query has ended
+        with self._cond:
+            self._cond.wait_for(lambda: self._written or self._done)
+            return self.error if not self._written else None
+
+    def values(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._read < self._written or self._done)
+
+                if self._read == self._written:
+                    if self.error is not None:
+                        # the response has started, so this can only cut it short
+                        raise ColumnQueryError(self.name, self.error)
+                    return
+
+                self._file.seek(self._read_offset)
+                batch = pickle.load(self._file)
+                self._read_offset = self._file.tell()
+                self._read += 1
+
+            yield from batch
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._file.close()
+
+def stream_column(job, params, stream : ColumnStream, yield_per : int = EXPORT_YIELD_PER):
+    # Used as a run_columns runner, so exports share the per-connection slots
+    # of runs; a column whose export was abandoned before its turn never runs.
+    error = None
+
+    try:
+        if not stream.closed:
+            with get_connection_engine(job.connection_id).connect() as conn:
+                # exports are meant to stream everything: the plan is checked
+                # and the whole read is timed, but the rows are not capped
+                check_column_query(job, conn, params)
+
+                with statement_timeout(conn, EXPORT_QUERY_TIMEOUT_SECONDS):
+                    result = conn.execution_options(
+                        stream_results = True,
+                        yield_per = yield_per
+                    ).execute(text(job.query), params)
+
+                    for batch in result.partitions(yield_per):
+                        stream.append([row[0] for row in batch])
+    except ExportClosed:
+        pass
+    except Exception as exc:
+        error = query_error_message(exc)
+
+    stream.finish(error)
+
+def stream_report_rows(jobs, params):
+    # The first item yielded is the list of column names, produced once every
+    # column has read its first batch, so a query that fails up front still
+    # surfaces before the response starts; rows follow while the columns are
+    # being read.
+    streams = {job.id : ColumnStream(job.name) for job in jobs}
+    start_columns(jobs, params, lambda job, params: stream_column(job, params, streams[job.id]))
+
+    try:
+        for stream in streams.values():
+            error = stream.wait_started()
+            if error is not None:
+                raise ColumnQueryError(stream.name, error)
+
+        yield result_column_names((job.id, job.name) for job in jobs)
+        yield from zip_longest(*[stream.values() for stream in streams.values()])
+    finally:
+        # also stops the columns still reading when the client goes away
+        for stream in streams.values():
+            stream.close()
+
+def stream_stored_rows(table):
+    # a materialized result is read batch by batch from its memory mapping
+    yield table.column_names
+
+    for batch in table.to_batches(max_chunksize = EXPORT_CHUNK_ROWS):
+        yield from zip(*[column.to_pylist() for column in batch.columns])
+
+def encode_csv(names, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+
+    while True:
+        chunk = list(islice(rows, EXPORT_CHUNK_ROWS))
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+
+        if not chunk:
+            return
+
+        buffer.seek(0)
+        buffer.truncate()
+
+def encode_ndjson(names, rows):
+    while True:
+        chunk = list(islice(rows, EXPORT_CHUNK_ROWS))
+
+        if not chunk:
+            return
+
+        yield "".join(
+            json.dumps(dict(zip(names, row)), default = str) + "\n"
+            for row in chunk
+        )
+
+ENCODERS = {
+    ExportFormat.csv : encode_csv,
+    ExportFormat.ndjson : encode_ndjson
+}
+
+# EXPORT
+def export_report(db : Session, report_id : int, user_id : int, export_format : ExportFormat):
+    report = get_owned_report(db, report_id, user_id)
+
+    if not report:
+        return None
+
+    jobs = get_active_column_jobs(db, report.id)
+
+    stored = None
+    if report.type == ReportType.cached:
+        # the same result a run would serve, without touching the sources
+        bucket_start = interval_bucket_start(ReportInterval(report.interval))
+        stored = open_stored_table(report.id, params_key(report.params), bucket_start, result_version(report.version, jobs))
+
+    if stored is not None:
+        rows = stream_stored_rows(stored[0])
+    else:
+        rows = stream_report_rows(jobs, report.params or {})
+    names = next(rows)
+
+    return report.slug, ENCODERS[export_format](names, rows)
@@ -0,0 +1,169 @@
+import hashlib
+import logging
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from app.services.report_cache_service import params_key
+from app.services.report_execution_service import (
+    merge_column_results,
+    query_error_message,
+    result_column_names,
+    run_column,
+    run_columns
+)
+from app.services.report_store_service import read_latest_stored_table, stored_watermarks
+from app.services.query_guard_service import check_column_query, fetch_column_rows
+from config.connections import get_connection_engine
+from config.intervals import interval_bucket_start
+from config.validation import ReportInterval
+
+logger = logging.getLogger(__name__)
+
+# bind parameter carrying the last stored watermark into the wrapped query
+WATERMARK_PARAM = "report_watermark"
+
+def watermark_fingerprint(job) -> str:
+    # a stored watermark only applies to the exact query it was taken from
+    return hashlib.sha1(f"{job.query}\0{job.watermark_column}".encode()).hexdigest()[:16]
+
+def encode_watermark(value):
+    if isinstance(value, datetime):
+        return {"datetime" : value.isoformat()}
+    if isinstance(value, date):
+        return {"date" : value.isoformat()}
+    return {"value" : value}
+
+def decode_watermark(encoded):
+    if "datetime" in encoded:
+        return datetime.fromisoformat(encoded["datetime"])
+    if "date" in encoded:
+        return date.fromisoformat(encoded["date"])
+    return encoded["value"]
+
+def watermarked_query(job, engine, incremental : bool):
+    # Watermarked columns are always read in watermark order, rows without a
+    # watermark first, so the rows sharing the highest watermark are the last
+    # ones stored. An incremental read starts at that watermark (>=), not past
+    # it: rows that arrived with the same watermark after the last refresh are
+    # read along with the stored ones, which they replace. A full read and the
+    # increments after it therefore add up to the same rows; rows without a
+    # watermark are only picked up by full reads.
+    column = f"incremental_source.{engine.dialect.identifier_preparer.quote(job.watermark_column)}"
+    where = f"WHERE {column} >= :{WATERMARK_PARAM} " if incremental else ""
+
+    return (
+        f"SELECT * FROM ({job.query}) AS incremental_source {where}"
+        f"ORDER BY CASE WHEN {column} IS NULL THEN 0 ELSE 1 END, {column}"
+    )
+
+def _run_watermarked_column(job, params, watermark):
+    # With a watermark only the rows from it on are read, otherwise all of
+    # them. Returns the highest watermark seen and how many of the rows read,
+    # all at the end, carry it.
+    try:
+        engine = get_connection_engine(job.connection_id)
+        query = watermarked_query(job, engine, watermark is not None)
+
+        if watermark is not None:
+            params = {**params, WATERMARK_PARAM : watermark}
+
+        with engine.connect() as conn:
+            # the guard plans the statement that runs, not the bare job.query
+            check_column_query(job, conn, params, query)
+            result = fetch_column_rows(conn, text(query), params)
+
+            values = []
+            high = None
+            ties = 0
+
+            for row in result:
+                values.append(row[0])
+                mark = row._mapping[job.watermark_column]
+
+                if mark is None:
+                    continue
+                if high is not None and mark == high:
+                    ties += 1
+                else:
+                    high, ties = mark, 1
+        error = None
+    except KeyError:
+        values, high, ties = [], None, 0
+        error = f"Watermark column '{job.watermark_column}' is not in the query result"
+    except Exception as exc:
+        values, high, ties = [], None, 0
+        error = query_error_message(exc)
+
+    return {
+        "column_id" : job.id,
+        "name" : job.name,
+        "values" : values,
+        "error" : error,
+        "watermark" : high,
+        "ties" : ties
+    }
+
+def refresh_columns(report_id : int, jobs, params, interval, bucket_at : datetime, full : bool = False):
+    # Builds the result for the bucket containing bucket_at. Columns with a
+    # watermark extend the newest stored result of the same params by the
+    # rows from its watermark on; the others, and all columns when full is
+    # set, are computed from scratch. Report rows are positional, so when the
+    # extended columns did not all grow by the same number of rows every
+    # column is read again in full rather than storing misaligned rows.
+    base = None if full else read_latest_stored_table(
+        report_id, params_key(params), interval_bucket_start(ReportInterval(interval), bucket_at)
+    )
+    base_marks = stored_watermarks(base) if base is not None else {}
+    names = dict(zip(
+        (job.id for job in jobs),
+        result_column_names((job.id, job.name) for job in jobs)
+    ))
+
+    def run_incremental(job, params):
+        if not job.watermark_column:
+            return run_column(job, params)
+
+        mark = base_marks.get(str(job.id))
+        usable = (
+            mark is not None
+            and "ties" in mark
+            and mark["fingerprint"] == watermark_fingerprint(job)
+            and names[job.id] in base.column_names
+        )
+
+        if not usable:
+            return _run_watermarked_column(job, params, None)
+
+        result = _run_watermarked_column(job, params, decode_watermark(mark["watermark"]))
+
+        if result["error"] is None:
+            # stored columns are padded to a common length, keep only real
+            # rows, less the trailing ones at the watermark that were read again
+            kept = mark["rows"] - mark["ties"]
+            result["values"] = base.column(names[job.id]).to_pylist()[:kept] + result["values"]
+            result["increment"] = len(result["values"]) - mark["rows"]
+
+        return result
+
+    column_results = run_columns(jobs, params, run_incremental)
+    increments = {result["increment"] for result in column_results if "increment" in result}
+
+    if len(increments) > 1:
+        logger.info("columns of report %s grew by different row counts %s, rebuilding", report_id, sorted(increments))
+        return refresh_columns(report_id, jobs, params, interval, bucket_at, full = True)
+
+    result = merge_column_results(column_results)
+    result["report_id"] = report_id
+    result["watermarks"] = {
+        str(column_result["column_id"]) : {
+            "fingerprint" : watermark_fingerprint(job),
+            "watermark" : encode_watermark(column_result["watermark"]),
+            "ties" : column_result["ties"],
+            "rows" : len(column_result["values"])
+        }
+        for job, column_result in zip(jobs, column_results)
+        if job.watermark_column and column_result["error"] is None and column_result["watermark"] is not None
+    }
+
+    return result
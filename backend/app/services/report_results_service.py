@@ -0,0 +1,193 @@
+import os
+import hashlib
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy.orm import Session
+
+from app.services.report_cache_service import params_key, result_version
+from app.services.report_execution_service import get_active_column_jobs
+from app.services.report_store_service import open_stored_table
+from config.intervals import interval_bucket_start
+from config.utils import get_owned_report, encode_offset_cursor
+from config.validation import ReportInterval, ReportType
+
+# Most ?filter= conditions and ?sort= keys accepted on one request
+RESULTS_MAX_FILTERS = int(os.getenv("RESULTS_MAX_FILTERS", "10"))
+RESULTS_MAX_SORT_KEYS = int(os.getenv("RESULTS_MAX_SORT_KEYS", "4"))
+
+# ?filter=<column>:<operator>:<value>, the value is cast to the column's type
+FILTER_OPERATORS = {
+    "eq" : pc.equal,
+    "ne" : pc.not_equal,
+    "lt" : pc.less,
+    "le" : pc.less_equal,
+    "gt" : pc.greater,
+    "ge" : pc.greater_equal,
+    # case-insensitive substring, text columns only
+    "contains" : lambda values, value: pc.match_substring(values, value, ignore_case = True)
+}
+
+class ResultQueryError(ValueError):
+    pass
+
+# PARSING
+def parse_sort(sort, schema : pa.Schema):
+    # "-amount,region" -> [("amount", "descending"), ("region", "ascending")]
+    if not sort:
+        return []
+
+    keys = []
+
+    for item in sort.split(","):
+        item = item.strip()
+        name = item.lstrip("-")
+
+        if name not in schema.names:
+            raise ResultQueryError(f"Unknown sort column: {name}")
+
+        keys.append((name, "descending" if item.startswith("-") else "ascending"))
+
+    if len(keys) > RESULTS_MAX_SORT_KEYS:
+        raise ResultQueryError(f"At most {RESULTS_MAX_SORT_KEYS} sort columns are allowed")
+
+    return keys
+
+def parse_filters(filters, schema : pa.Schema):
+    # [(column, operator, value as an Arrow scalar or text for contains)]
+    if not filters:
+        return []
+
+    if len(filters) > RESULTS_MAX_FILTERS:
+        raise ResultQueryError(f"At most {RESULTS_MAX_FILTERS} filters are allowed")
+
+    conditions = []
+
+    for item in filters:
+        # the value may contain colons itself, e.g. a timestamp
+        parts = item.split(":", 2)
+
+        if len(parts) != 3:
+            raise ResultQueryError(f"Filters must look like column:operator:value, got {item!r}")
+
+        name, operator, raw = parts
+
+        if name not in schema.names:
+            raise ResultQueryError(f"Unknown filter column: {name}")
+        if operator not in FILTER_OPERATORS:
+            raise ResultQueryError(f"Unknown filter operator: {operator} (one of {', '.join(FILTER_OPERATORS)})")
+
+        column_type = schema.field(name).type
+
+        if operator == "contains":
+            if not (pa.types.is_string(column_type) or pa.types.is_large_string(column_type)):
+                raise ResultQueryError(f"contains only applies to text columns, {name} is {column_type}")
+            conditions.append((name, operator, raw))
+            continue
+
+        try:
+            value = pa.scalar(raw).cast(column_type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+            raise ResultQueryError(f"{raw!r} is not a valid {column_type} value for {name}")
+
+        conditions.append((name, operator, value))
+
+    return conditions
+
+def parse_columns(columns, schema : pa.Schema):
+    # ?columns= in the order asked for, like ?fields= every name must exist
+    if columns is None:
+        return None
+
+    names = list(dict.fromkeys(columns))
+    unknown = [name for name in names if name not in schema.names]
+
+    if unknown or not names:
+        raise ResultQueryError(f"Unknown columns: {', '.join(unknown)}" if unknown else "No columns requested")
+
+    return names
+
+# SELECTION
+def select_rows(table : pa.Table, conditions, sort_keys, offset : int, limit : int):
+    # Only the filter and sort columns are read in full; every other column
+    # is only touched for the rows of the page. Returns (page, matching rows).
+    indices = None
+
+    if conditions:
+        mask = None
+
+        for name, operator, value in conditions:
+            matched = FILTER_OPERATORS[operator](table[name], value)
+            mask = matched if mask is None else pc.and_kleene(mask, matched)
+
+        # a null comparison never matches
+        indices = pc.indices_nonzero(mask)
+
+    total = table.num_rows if indices is None else len(indices)
+
+    if sort_keys:
+        keys = table.select([name for name, _ in sort_keys])
+        if indices is not None:
+            keys = keys.take(indices)
+
+        # stable with nulls last, so rows with equal keys keep their stored order across pages
+        order = pc.sort_indices(keys, sort_keys = sort_keys)
+        indices = order if indices is None else indices.take(order)
+
+    if indices is None:
+        # zero-copy
+        return table.slice(offset, limit), total
+
+    return table.take(indices.slice(offset, limit)), total
+
+def result_view(snapshot : str, sort_keys, conditions) -> str:
+    # one stored version of the result in one filtered order
+    return hashlib.sha1(repr((snapshot, sort_keys, [(name, operator, str(value)) for name, operator, value in conditions])).encode()).hexdigest()[:16]
+
+# READ
+def read_report_results(db : Session, report_id : int, user_id : int, limit : int, after = None, sort = None, filters = None, columns = None, at = None):
+    report = get_owned_report(db, report_id, user_id)
+
+    if not report:
+        return None
+
+    if report.type != ReportType.cached:
+        return "NOT CACHED"
+
+    # the stored result of the report's own params, like a run without params;
+    # the live bucket must match the current versions, past buckets are history
+    bucket_start = interval_bucket_start(ReportInterval(report.interval), at)
+    version = result_version(report.version, get_active_column_jobs(db, report.id)) if at is None else None
+    stored = open_stored_table(report.id, params_key(report.params), bucket_start, version)
+
+    if stored is None:
+        return "NO RESULT"
+
+    table, snapshot = stored
+    sort_keys = parse_sort(sort, table.schema)
+    conditions = parse_filters(filters, table.schema)
+    columns = parse_columns(columns, table.schema)
+    view = result_view(snapshot, sort_keys, conditions)
+
+    offset = 0
+    if after is not None:
+        after_view, offset = after
+        if after_view != view:
+            return "STALE CURSOR"
+
+    page, total = select_rows(table, conditions, sort_keys, offset, limit)
+
+    if columns is not None:
+        page = page.select(columns)
+
+    next_offset = offset + page.num_rows
+    next_cursor = encode_offset_cursor(view, next_offset) if next_offset < total else None
+
+    result = {
+        "report_id" : report.id,
+        "columns" : page.column_names,
+        "rows" : page.to_pylist(),
+        "total" : total
+    }
+
+    return result, next_cursor, view
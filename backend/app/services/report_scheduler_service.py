@@ -0,0 +1,175 @@
+import os
+import random
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.models.reports import Reports
+from app.models.report_schedule import ReportSchedule
+from app.services.report_cache_service import result_version, store_cached_result
+from app.services.report_execution_service import get_active_column_jobs
+from app.services.report_refresh_service import refresh_columns
+from config.background import PeriodicTask
+from config.database import SessionLocal
+from config.intervals import next_interval_boundary
+from config.utils import get_owned_report
+from config.validation import ReportInterval, ReportStatus, ReportType
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_POLL_SECONDS = float(os.getenv("SCHEDULER_POLL_SECONDS", "30"))
+# Refreshes start this long before the interval boundary ...
+SCHEDULER_LEAD_SECONDS = float(os.getenv("SCHEDULER_LEAD_SECONDS", "600"))
+# ... plus a random offset of up to this much, so reports sharing a boundary
+# do not all fire together. Must stay below the lead time.
+SCHEDULER_JITTER_SECONDS = float(os.getenv("SCHEDULER_JITTER_SECONDS", "480"))
+SCHEDULER_MAX_CONCURRENT = int(os.getenv("SCHEDULER_MAX_CONCURRENT", "4"))
+
+def plan_next_run(interval, now : datetime) -> datetime:
+    boundary = next_interval_boundary(ReportInterval(interval), now)
+    jitter = random.uniform(0, min(SCHEDULER_JITTER_SECONDS, SCHEDULER_LEAD_SECONDS))
+    run_at = boundary - timedelta(seconds = SCHEDULER_LEAD_SECONDS - jitter)
+
+    if run_at <= now:
+        # already inside the lead window: refresh now for the coming bucket
+        return now
+
+    return run_at
+
+def _scheduled_reports(db):
+    return db.query(Reports).filter(
+        Reports.type == ReportType.cached.value,
+        Reports.status == ReportStatus.active.value
+    )
+
+def ensure_schedules(db, now : datetime):
+    unscheduled = _scheduled_reports(db).outerjoin(
+        ReportSchedule, ReportSchedule.report_id == Reports.id
+    ).filter(ReportSchedule.report_id.is_(None)).with_entities(
+        Reports.id, Reports.interval
+    ).all()
+
+    for report_id, interval in unscheduled:
+        db.add(ReportSchedule(
+            report_id = report_id,
+            next_run_at = plan_next_run(interval, now)
+        ))
+
+    db.commit()
+
+def claim_schedule(db, report_id : int, scheduled_at : datetime, interval, now : datetime):
+    # Compare-and-set on next_run_at so only one process refreshes a report
+    # for a given boundary, even with several workers polling the same table.
+    boundary = next_interval_boundary(ReportInterval(interval), scheduled_at)
+    claimed = db.execute(
+        update(ReportSchedule).where(
+            ReportSchedule.report_id == report_id,
+            ReportSchedule.next_run_at == scheduled_at
+        ).values(next_run_at = plan_next_run(interval, max(boundary, now)))
+    ).rowcount == 1
+    db.commit()
+
+    return claimed, boundary
+
+def refresh_report(report_id : int, interval, params, bucket_at : datetime, full : bool = False):
+    # incremental unless full: watermarked columns only read their new rows
+    db = SessionLocal()
+    try:
+        jobs = get_active_column_jobs(db, report_id)
+        version = result_version(db.query(Reports.version).filter(Reports.id == report_id).scalar(), jobs)
+        result = refresh_columns(report_id, jobs, params or {}, interval, bucket_at, full)
+
+        if result["errors"]:
+            last_status = "error"
+            last_error = "; ".join(f"{name}: {error}" for name, error in result["errors"].items())
+        else:
+            store_cached_result(report_id, params or {}, interval, version, result, bucket_at)
+            last_status = "ok"
+            last_error = None
+
+        db.execute(
+            update(ReportSchedule).where(
+                ReportSchedule.report_id == report_id
+            ).values(
+                last_run_at = datetime.utcnow(),
+                last_status = last_status,
+                last_error = last_error
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    return result
+
+# REBUILD
+def rebuild_report(db, report_id : int, user_id : int, now : datetime | None = None):
+    # Recomputes the current bucket from scratch, dropping the watermarks;
+    # the next scheduled refresh continues incrementally from the rebuild.
+    report = get_owned_report(db, report_id, user_id)
+
+    if not report:
+        return None
+
+    if report.type != ReportType.cached:
+        return "NOT CACHED"
+
+    return refresh_report(report.id, report.interval, report.params, now or datetime.utcnow(), full = True)
+
+class ReportScheduler:
+    def __init__(self, poll_seconds : float = SCHEDULER_POLL_SECONDS, max_concurrent : int = SCHEDULER_MAX_CONCURRENT):
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._task = PeriodicTask("report-scheduler", poll_seconds, self.run_pending)
+
+    def start(self):
+        self._task.start()
+
+    def stop(self):
+        self._task.stop()
+
+    def run_pending(self, now : datetime | None = None):
+        now = now or datetime.utcnow()
+        db = SessionLocal()
+        try:
+            ensure_schedules(db, now)
+
+            due = _scheduled_reports(db).join(
+                ReportSchedule, ReportSchedule.report_id == Reports.id
+            ).filter(
+                ReportSchedule.next_run_at <= now
+            ).order_by(ReportSchedule.next_run_at).with_entities(
+                Reports.id, ReportSchedule.next_run_at, Reports.interval, Reports.params
+            ).all()
+
+            for report_id, scheduled_at, interval, params in due:
+                # leave the rest due for a later tick instead of queueing them
+                if not self._slots.acquire(blocking = False):
+                    break
+
+                claimed, boundary = claim_schedule(db, report_id, scheduled_at, interval, now)
+
+                if not claimed:
+                    self._slots.release()
+                    continue
+
+                threading.Thread(
+                    target = self._refresh,
+                    args = (report_id, interval, params, max(boundary, now)),
+                    name = f"report-refresh-{report_id}",
+                    daemon = True
+                ).start()
+        finally:
+            db.close()
+
+    def _refresh(self, report_id, interval, params, bucket_at):
+        try:
+            refresh_report(report_id, interval, params, bucket_at)
+        except Exception:
+            logger.exception("Scheduled refresh of report %s failed", report_id)
+        finally:
+            self._slots.release()
+
+report_scheduler = ReportScheduler()
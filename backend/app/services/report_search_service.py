@@ -0,0 +1,91 @@
+import re
+
+from sqlalchemy import Float, Integer, and_, func, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.models.reports import Reports
+from config.utils import encode_rank_cursor
+
+# Longer queries are cut to this many terms
+SEARCH_MAX_TERMS = 10
+# Matches in column names/descriptions count this much of a title match
+COLUMN_MATCH_WEIGHT = 0.5
+
+# Each dialect ranks the user's reports matching :match in their own text or
+# in any of their columns; a report's score is the sum of its matches.
+_MATCHES_SQL = {
+    "sqlite" : """
+        SELECT reports.id AS report_id, -bm25(reports_fts) AS score
+        FROM reports_fts JOIN reports ON reports.id = reports_fts.rowid
+        WHERE reports_fts MATCH :match AND reports.user_id = :user_id
+        UNION ALL
+        SELECT report_columns.report_id, -bm25(report_columns_fts) * :column_weight
+        FROM report_columns_fts
+        JOIN report_columns ON report_columns.id = report_columns_fts.rowid
+        JOIN reports ON reports.id = report_columns.report_id
+        WHERE report_columns_fts MATCH :match AND reports.user_id = :user_id
+    """,
+    "mysql" : """
+        SELECT reports.id AS report_id, MATCH (reports.title, reports.description) AGAINST (:match IN BOOLEAN MODE) AS score
+        FROM reports
+        WHERE MATCH (reports.title, reports.description) AGAINST (:match IN BOOLEAN MODE) AND reports.user_id = :user_id
+        UNION ALL
+        SELECT report_columns.report_id, MATCH (report_columns.name, report_columns.description) AGAINST (:match IN BOOLEAN MODE) * :column_weight
+        FROM report_columns JOIN reports ON reports.id = report_columns.report_id
+        WHERE MATCH (report_columns.name, report_columns.description) AGAINST (:match IN BOOLEAN MODE) AND reports.user_id = :user_id
+    """
+}
+
+def search_terms(q : str):
+    return re.findall(r"\w+", q.lower())[:SEARCH_MAX_TERMS]
+
+def match_expression(dialect_name : str, terms):
+    # every term must match, each as a prefix
+    if dialect_name == "mysql":
+        return " ".join(f"+{term}*" for term in terms)
+    return " ".join(f'"{term}"*' for term in terms)
+
+def search_statement(dialect_name : str, user_id : int, terms, limit : int, after = None):
+    # after: (score, id) of the last report of the previous page
+    matches = text(_MATCHES_SQL[dialect_name]).bindparams(
+        match = match_expression(dialect_name, terms),
+        user_id = user_id,
+        column_weight = COLUMN_MATCH_WEIGHT
+    ).columns(report_id = Integer, score = Float).subquery("matches")
+
+    ranked = select(
+        matches.c.report_id.label("report_id"),
+        func.sum(matches.c.score).label("score")
+    ).group_by(matches.c.report_id).subquery("ranked")
+
+    statement = select(Reports, ranked.c.score).join(
+        ranked, ranked.c.report_id == Reports.id
+    )
+
+    if after is not None:
+        score, last_id = after
+        statement = statement.filter(or_(
+            ranked.c.score < score,
+            and_(ranked.c.score == score, Reports.id < last_id)
+        ))
+
+    return statement.order_by(ranked.c.score.desc(), Reports.id.desc()).limit(limit + 1)
+
+def search_page(rows, limit):
+    next_cursor = None
+
+    if len(rows) > limit:
+        report, score = rows[limit - 1]
+        next_cursor = encode_rank_cursor(score, report.id)
+
+    return [tuple(row) for row in rows[:limit]], next_cursor
+
+# SEARCH: (report, score) pairs, best match first
+def search_reports(db : Session, user_id : int, q : str, limit : int, after = None):
+    terms = search_terms(q)
+
+    if not terms:
+        return [], None
+
+    statement = search_statement(db.get_bind().dialect.name, user_id, terms, limit, after)
+    return search_page(db.execute(statement).all(), limit)
@@ -1,13 +1,17 @@
 from app.schemas.report import ReportCreate
 from app.models.reports import Reports
-from config.utils import generate_slug
+from app.models.report_schedule import ReportSchedule
+from config.utils import generate_slug, keyset_page, bump_version, load_fields, row_columns
 from config.validation import UserRole
+from app.services.report_cache_service import invalidate_report_cache, drop_report_cache
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
-# CREATE
-def create_report_service(db: Session, payload: ReportCreate, user_id : int):
-    report = Reports(
+# Changing any of these re-plans the report's scheduled refreshes
+SCHEDULE_FIELDS = {"type", "interval", "status"}
+
+def build_report(payload : ReportCreate, user_id : int):
+    return Reports(
         user_id = user_id,
         title = payload.title,
         description = payload.description,
@@ -17,6 +21,10 @@ def create_report_service(db: Session, payload: ReportCreate, user_id : int):
         slug = generate_slug(payload.title),
         params = payload.params
     )
+
+# CREATE
+def create_report_service(db: Session, payload: ReportCreate, user_id : int):
+    report = build_report(payload, user_id)
     db.add(report)
     db.commit()
     db.refresh(report)
@@ -24,13 +32,38 @@ def create_report_service(db: Session, payload: ReportCreate, user_id : int):
     return report
 
 # READ
-def get_my_reports(db : Session, user_id : int, limit : int, offset : int):
-    return db.query(Reports).filter(Reports.user_id == user_id).order_by(Reports.id.desc()).offset(offset).limit(limit).all()
+def with_columns(query, include_columns : bool):
+    # one extra SELECT ... WHERE report_id IN (...) for the whole page
+    return query.options(selectinload(Reports.columns)) if include_columns else query
+
+def get_my_reports(db : Session, user_id : int, limit : int, offset : int, after_id : int | None = None, include_columns : bool = False, fields = None):
+    query = with_columns(db.query(Reports).filter(Reports.user_id == user_id), include_columns)
+    query = load_fields(query, Reports, fields)
+    return keyset_page(query, Reports.id, limit, offset, after_id)
+
+def get_all_reports(db : Session, limit : int, offset : int, after_id : int | None = None):
+    return keyset_page(db.query(Reports), Reports.id, limit, offset, after_id)
 
-def get_report_by_id(db : Session, current_user, report_id : int):
-    query = db.query(Reports).filter(
+# Same pages as plain row tuples, selected fields first
+def get_my_report_rows(db : Session, user_id : int, limit : int, offset : int, after_id : int | None = None, fields = ()):
+    query = db.query(*row_columns(Reports, fields)).filter(Reports.user_id == user_id)
+    return keyset_page(query, Reports.id, limit, offset, after_id)
+
+def get_all_report_rows(db : Session, limit : int, offset : int, after_id : int | None = None, fields = ()):
+    return keyset_page(db.query(*row_columns(Reports, fields)), Reports.id, limit, offset, after_id)
+
+# (id, version) of the same page, to validate a cached copy without loading it
+def get_my_report_versions(db : Session, user_id : int, limit : int, offset : int, after_id : int | None = None):
+    query = db.query(Reports.id, Reports.version).filter(Reports.user_id == user_id)
+    return keyset_page(query, Reports.id, limit, offset, after_id)
+
+def get_all_report_versions(db : Session, limit : int, offset : int, after_id : int | None = None):
+    return keyset_page(db.query(Reports.id, Reports.version), Reports.id, limit, offset, after_id)
+
+def get_report_by_id(db : Session, current_user, report_id : int, include_columns : bool = False):
+    query = with_columns(db.query(Reports).filter(
         Reports.id == report_id
-    )
+    ), include_columns)
 
     if current_user.role != UserRole.admin:
         query = query.filter(Reports.user_id == current_user.id)
@@ -48,11 +81,18 @@ def update_report(db, report_id, user_id, payload):
     if not report:
         return None 
     
-    for key, value in payload.dict(exclude_unset = True).items():
+    changes = payload.dict(exclude_unset = True)
+    for key, value in changes.items():
         setattr(report, key, value)
+    bump_version(report)
+
+    # let the scheduler re-plan refreshes for the new type/interval
+    if changes.keys() & SCHEDULE_FIELDS:
+        db.query(ReportSchedule).filter(ReportSchedule.report_id == report.id).delete()
     
     db.commit()
     db.refresh(report)
+    invalidate_report_cache(report.id)
     return report
 
 # DELETE
@@ -66,4 +106,5 @@ def delete_report(db, report_id, user_id):
         return "NO REPORT"
 
     db.delete(report)
-    db.commit()
\ No newline at end of file
+    db.commit()
+    drop_report_cache(report_id)
\ No newline at end of file
@@ -0,0 +1,188 @@
+import os
+import glob
+import json
+import shutil
+import hashlib
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from config.filesystem import REPORT_RESULTS_DIR
+
+# Rows per record batch in stored files; filters are evaluated batch by batch
+STORE_BATCH_ROWS = int(os.getenv("REPORT_STORE_BATCH_ROWS", "65536"))
+
+_BUCKET_FORMAT = "%Y%m%dT%H%M%S"
+# schema metadata key holding the incremental watermarks of a stored result
+_WATERMARKS_KEY = b"report.watermarks"
+# schema metadata key holding the report and column versions a result was computed from
+_VERSION_KEY = b"report.version"
+_mmap_filesystem = pafs.LocalFileSystem(use_mmap = True)
+
+# Materialized results are Arrow IPC files laid out as
+#   <REPORT_RESULTS_DIR>/<report_id>/<params hash>/<bucket start>_<bucket end>.arrow
+# with one Arrow column per report column. A result built incrementally also
+# carries its watermarks in the file's schema metadata, so they can never
+# drift from the rows they describe. The versions the result was computed
+# from are kept there as well: a run that started before an edit may still
+# write its file after the edit discarded the old one, and readers that ask
+# for a version treat such a file as missing.
+
+def _params_dir(report_id : int, params_key : str) -> str:
+    digest = hashlib.sha1(params_key.encode()).hexdigest()[:16]
+    return os.path.join(REPORT_RESULTS_DIR, str(report_id), digest)
+
+def _find_bucket_file(report_id : int, params_key : str, bucket_start : datetime):
+    pattern = os.path.join(
+        _params_dir(report_id, params_key),
+        f"{bucket_start.strftime(_BUCKET_FORMAT)}_*.arrow"
+    )
+    matches = glob.glob(pattern)
+    return matches[0] if matches else None
+
+def _find_latest_bucket_file(report_id : int, params_key : str, bucket_start : datetime):
+    # the newest stored bucket starting at or before bucket_start
+    bucket_key = bucket_start.strftime(_BUCKET_FORMAT)
+    paths = [
+        path for path in glob.glob(os.path.join(_params_dir(report_id, params_key), "*.arrow"))
+        if os.path.basename(path).split("_")[0] <= bucket_key
+    ]
+    return max(paths, key = os.path.basename, default = None)
+
+def _encode_version(version) -> bytes:
+    return json.dumps(version).encode()
+
+def _matches_version(schema : pa.Schema, version) -> bool:
+    # without a version any stored result matches, e.g. past buckets kept as history
+    return version is None or (schema.metadata or {}).get(_VERSION_KEY) == _encode_version(version)
+
+def _to_arrow_array(values):
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # mixed types within one column fall back to their text form
+        return pa.array([None if value is None else str(value) for value in values], pa.string())
+
+def result_to_table(result, version = None) -> pa.Table:
+    rows = result["rows"]
+    table = pa.table({
+        name : _to_arrow_array([row.get(name) for row in rows])
+        for name in result["columns"]
+    })
+    metadata = {}
+
+    if result.get("watermarks"):
+        metadata[_WATERMARKS_KEY] = json.dumps(result["watermarks"])
+    if version is not None:
+        metadata[_VERSION_KEY] = _encode_version(version)
+
+    return table.replace_schema_metadata(metadata or None)
+
+def table_to_result(report_id : int, table : pa.Table):
+    return {
+        "report_id" : report_id,
+        "columns" : table.column_names,
+        "rows" : table.to_pylist(),
+        "errors" : {}
+    }
+
+def write_stored_result(report_id : int, params_key : str, bucket_start : datetime, bucket_end : datetime, result, version = None):
+    directory = _params_dir(report_id, params_key)
+    os.makedirs(directory, exist_ok = True)
+
+    path = os.path.join(
+        directory,
+        f"{bucket_start.strftime(_BUCKET_FORMAT)}_{bucket_end.strftime(_BUCKET_FORMAT)}.arrow"
+    )
+    table = result_to_table(result, version)
+
+    # write then rename so readers never map a half-written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize = STORE_BATCH_ROWS)
+    os.replace(tmp_path, path)
+
+    return path
+
+def read_stored_table(report_id : int, params_key : str, bucket_start : datetime, columns = None, predicate = None, version = None):
+    # Memory-mapped read: only the projected columns of the batches that
+    # survive the filter are touched, the rest of the file stays on disk.
+    path = _find_bucket_file(report_id, params_key, bucket_start)
+
+    if path is None:
+        return None
+
+    dataset = ds.dataset(path, format = "arrow", filesystem = _mmap_filesystem)
+
+    if not _matches_version(dataset.schema, version):
+        return None
+
+    if columns is not None:
+        columns = [name for name in columns if name in dataset.schema.names]
+
+    return dataset.to_table(columns = columns, filter = predicate)
+
+def read_latest_stored_table(report_id : int, params_key : str, bucket_start : datetime):
+    path = _find_latest_bucket_file(report_id, params_key, bucket_start)
+
+    if path is None:
+        return None
+
+    # the table's buffers keep the mapping alive after this returns
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+def open_stored_table(report_id : int, params_key : str, bucket_start : datetime, version = None):
+    # (table, snapshot) of one bucket without reading it: columns are paged in
+    # from the mapping as they are touched. A rewrite replaces the file, so
+    # the snapshot changes with every new version of the result.
+    path = _find_bucket_file(report_id, params_key, bucket_start)
+
+    if path is None:
+        return None
+
+    try:
+        source = pa.memory_map(path)
+    except FileNotFoundError:
+        return None
+
+    stat = os.fstat(source.fileno())
+    snapshot = hashlib.sha1(f"{path}:{stat.st_ino}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+
+    table = pa.ipc.open_file(source).read_all()
+
+    if not _matches_version(table.schema, version):
+        return None
+
+    return table, snapshot
+
+def stored_watermarks(table : pa.Table):
+    metadata = table.schema.metadata or {}
+    return json.loads(metadata[_WATERMARKS_KEY]) if _WATERMARKS_KEY in metadata else {}
+
+def read_stored_result(report_id : int, params_key : str, bucket_start : datetime, columns = None, predicate = None, version = None):
+    table = read_stored_table(report_id, params_key, bucket_start, columns, predicate, version)
+
+    if table is None:
+        return None
+
+    return table_to_result(report_id, table)
+
+def discard_live_results(report_id : int, now : datetime | None = None):
+    # Drops results whose bucket has not ended yet; finished buckets are kept
+    # as history.
+    now_key = (now or datetime.utcnow()).strftime(_BUCKET_FORMAT)
+
+    for path in glob.glob(os.path.join(REPORT_RESULTS_DIR, str(report_id), "*", "*.arrow")):
+        bucket_end = os.path.basename(path)[:-len(".arrow")].split("_")[1]
+
+        if bucket_end > now_key:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+def delete_stored_results(report_id : int):
+    shutil.rmtree(os.path.join(REPORT_RESULTS_DIR, str(report_id)), ignore_errors = True)
@@ -0,0 +1,53 @@
+"""Helpers shared by the benchmark scripts in this directory (stdlib only)."""
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+
+def request(url, data = None, headers = None, form = False):
+    status, body, _ = send(url, data, headers, form)
+    return status, body
+
+def send(url, data = None, headers = None, form = False, method = None):
+    # like request(), but with any method and the response headers as well
+    body = None
+    headers = dict(headers or {})
+
+    if data is not None and form:
+        body = urllib.parse.urlencode(data).encode()
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    elif data is not None:
+        body = json.dumps(data).encode()
+        headers["Content-Type"] = "application/json"
+
+    req = urllib.request.Request(url, data = body, headers = headers, method = method)
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, resp.read(), resp.headers
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.read(), exc.headers
+
+def percentiles(samples):
+    if not samples:
+        return {}
+
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "count" : len(ordered),
+        "p50_ms" : round(pick(0.50) * 1000, 2),
+        "p95_ms" : round(pick(0.95) * 1000, 2),
+        "p99_ms" : round(pick(0.99) * 1000, 2)
+    }
+
+def login(base, email, password):
+    # signs the user up first if needed and returns bearer auth headers
+    request(f"{base}/auth/signup", {"email" : email, "password" : password, "role" : "user"})
+    status, body = request(f"{base}/auth/login", {"username" : email, "password" : password}, form = True)
+
+    if status != 200:
+        raise SystemExit(f"login failed: {status} {body!r}")
+
+    return {"Authorization" : "Bearer " + json.loads(body)["access_token"]}
+
@@ -0,0 +1,84 @@
+"""Throughput of the CRUD routes at high concurrency, to compare DB modes.
+
+Start one worker in each mode and point the script at it, e.g.
+
+    DB_MODE=sync  uvicorn server:app --port 8000
+    python bench/db_mode_load.py --label sync --concurrency 200
+
+    DB_MODE=async uvicorn server:app --port 8000
+    python bench/db_mode_load.py --label async --concurrency 200
+
+Sync handlers are capped by the request threadpool (40 threads by default),
+async handlers by the DB pool, so with concurrency above the threadpool size
+the async worker should complete more requests per second.
+"""
+import json
+import time
+import argparse
+import threading
+
+from common import request, percentiles, login
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default = "http://localhost:8000")
+    parser.add_argument("--label", default = "run")
+    parser.add_argument("--email", default = "bench-load@example.com")
+    parser.add_argument("--password", default = "bench-password")
+    parser.add_argument("--concurrency", type = int, default = 200)
+    parser.add_argument("--seconds", type = float, default = 15)
+    parser.add_argument("--reports", type = int, default = 20)
+    args = parser.parse_args()
+
+    base = args.base_url.rstrip("/")
+    auth = login(base, args.email, args.password)
+
+    report_ids = []
+    for i in range(args.reports):
+        status, body = request(f"{base}/reports", {
+            "title" : f"Load report {i}",
+            "type" : "realtime",
+            "interval" : "daily",
+            "status" : "active"
+        }, headers = auth)
+        report_ids.append(json.loads(body)["id"])
+
+    samples = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def client(index):
+        n = index
+        while time.perf_counter() < deadline:
+            # alternate list and detail reads
+            url = f"{base}/reports" if n % 2 else f"{base}/reports/{report_ids[n % len(report_ids)]}"
+            started = time.perf_counter()
+            status, _ = request(url, headers = auth)
+            elapsed = time.perf_counter() - started
+
+            with lock:
+                if status == 200:
+                    samples.append(elapsed)
+                else:
+                    errors[0] += 1
+            n += 1
+
+    threads = [threading.Thread(target = client, args = (i,), daemon = True) for i in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    print(json.dumps({
+        "label" : args.label,
+        "concurrency" : args.concurrency,
+        "requests_per_second" : round(len(samples) / duration, 1),
+        "errors" : errors[0],
+        "latency" : percentiles(samples)
+    }, indent = 2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Report-read latency before and during a login storm.
+
+Run against a live server, e.g.
+
+    uvicorn server:app --port 8000
+    python bench/login_spike.py --base-url http://localhost:8000
+
+Readers call GET /reports at a fixed concurrency for the whole run. After a
+baseline phase, a burst of concurrent logins is fired. The script prints
+p50/p95/p99 read latency for both phases and the status codes the logins
+received as JSON. With the bounded password-hash pool the spike phase should
+stay close to the baseline, with surplus logins answered 503.
+"""
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from common import request, percentiles, login
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default = "http://localhost:8000")
+    parser.add_argument("--email", default = "bench-reader@example.com")
+    parser.add_argument("--password", default = "bench-password")
+    parser.add_argument("--readers", type = int, default = 8)
+    parser.add_argument("--logins", type = int, default = 200)
+    parser.add_argument("--login-concurrency", type = int, default = 64)
+    parser.add_argument("--baseline-seconds", type = float, default = 5)
+    args = parser.parse_args()
+
+    base = args.base_url.rstrip("/")
+    credentials = {"username" : args.email, "password" : args.password}
+
+    auth = login(base, args.email, args.password)
+
+    phase = ["baseline"]
+    samples = {"baseline" : [], "spike" : []}
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            current = phase[0]
+            started = time.perf_counter()
+            request(f"{base}/reports", headers = auth)
+            samples[current].append(time.perf_counter() - started)
+
+    readers = [threading.Thread(target = reader, daemon = True) for _ in range(args.readers)]
+    for thread in readers:
+        thread.start()
+
+    time.sleep(args.baseline_seconds)
+    phase[0] = "spike"
+
+    with ThreadPoolExecutor(max_workers = args.login_concurrency) as pool:
+        statuses = list(pool.map(
+            lambda _: request(f"{base}/auth/login", credentials, form = True)[0],
+            range(args.logins)
+        ))
+
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    login_statuses = {}
+    for status in statuses:
+        login_statuses[str(status)] = login_statuses.get(str(status), 0) + 1
+
+    print(json.dumps({
+        "reads" : {name : percentiles(values) for name, values in samples.items()},
+        "login_statuses" : login_statuses
+    }, indent = 2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Validated vs fast JSON responses on 100-item list pages.
+
+Seeds a database (or reuses --database-url), boots server:app once with
+FAST_JSON_ENABLED=false and once with it on, and drives the list routes at
+limit=100 under each Accept-Encoding, e.g.
+
+    python bench/serialization.py --seconds 10 --concurrency 8
+
+Each page is fetched from both servers first and the decoded bodies compared,
+so a speedup is only reported for identical output. Writes throughput,
+latency percentiles and body size per path, route and encoding.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+
+from common import send
+from harness import Call, Worker, seed, seed_source, sample_ids, free_port, start_server, login, run_scenario, git_revision
+
+PAGE = 100
+ENCODINGS = ["identity", "gzip", "br"]
+MODES = {"validated" : "false", "fast" : "true"}
+
+# name -> fn(worker) returning the Call to time, as in harness.SCENARIOS
+ROUTES = {
+    "GET /reports" : lambda w: Call("GET", f"/reports?limit={PAGE}"),
+    "GET /reports?fields=id,title" : lambda w: Call("GET", f"/reports?limit={PAGE}&fields=id,title"),
+    "GET /reports/{id}/columns" : lambda w: Call("GET", f"/reports/{w.report_ids[0]}/columns?limit={PAGE}"),
+    "GET /admin/reports" : lambda w: Call("GET", f"/admin/reports?limit={PAGE}", as_admin = True)
+}
+
+def fetch(base, worker, call, admin_headers, encoding):
+    headers = admin_headers if call.as_admin else worker.headers
+    status, body, response_headers = send(f"{base}{call.path}", headers = {**headers, "Accept-Encoding" : encoding})
+    return status, body, response_headers.get("Content-Encoding")
+
+def run_mode(args, database_url, source_url, engine, workdir, fast_json):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    server = start_server(database_url, source_url, port, os.path.join(workdir, "results"), {"FAST_JSON_ENABLED" : fast_json})
+
+    try:
+        admin_headers = {"Authorization" : "Bearer " + login(base, "bench-admin@example.com")["access_token"]}
+        email = "bench-user-0@example.com"
+        report_ids, columns = sample_ids(engine, email)
+        identity = {
+            "email" : email,
+            "headers" : {"Authorization" : "Bearer " + login(base, email)["access_token"]},
+            "report_ids" : report_ids or [0],
+            "columns" : columns or [(0, 0)]
+        }
+
+        bodies = {}
+        results = {}
+
+        for name, build in ROUTES.items():
+            probe = Worker(0, base, identity)
+            status, body, _ = fetch(base, probe, build(probe), admin_headers, "identity")
+            bodies[name] = json.loads(body) if status == 200 else None
+
+            for encoding in ENCODINGS:
+                _, body, applied = fetch(base, probe, build(probe), admin_headers, encoding)
+                workers = [
+                    Worker(i, base, {**identity, "headers" : {**identity["headers"], "Accept-Encoding" : encoding}})
+                    for i in range(args.concurrency)
+                ]
+                results.setdefault(name, {})[encoding] = {
+                    **run_scenario(f"{name} [{encoding}]", build, workers, args.seconds, {**admin_headers, "Accept-Encoding" : encoding}),
+                    "content_encoding" : applied,
+                    "body_bytes" : len(body)
+                }
+    finally:
+        server.terminate()
+        server.wait()
+
+    return results, bodies
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default = None, help = "defaults to a fresh SQLite file")
+    parser.add_argument("--source-url", default = None)
+    # two users with 200 reports of 100 columns each, so every page is full
+    parser.add_argument("--users", type = int, default = 2)
+    parser.add_argument("--reports", type = int, default = 400)
+    parser.add_argument("--columns", type = int, default = 40_000)
+    parser.add_argument("--concurrency", type = int, default = 8)
+    parser.add_argument("--seconds", type = float, default = 5, help = "per route, encoding and mode")
+    parser.add_argument("--output", default = "bench-results-serialization.json")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix = "report-bench-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    source_url = args.source_url or f"sqlite:///{os.path.join(workdir, 'source.db')}"
+
+    engine = seed(database_url, max(1, args.users), max(1, args.reports), args.columns)
+    seed_source(source_url)
+
+    modes = {}
+    bodies = {}
+    for mode, fast_json in MODES.items():
+        modes[mode], bodies[mode] = run_mode(args, database_url, source_url, engine, workdir, fast_json)
+
+    comparison = {}
+    for name in ROUTES:
+        validated = modes["validated"][name]["identity"]["throughput_rps"]
+        fast = modes["fast"][name]["identity"]["throughput_rps"]
+        comparison[name] = {
+            "identical" : bodies["validated"][name] is not None and bodies["validated"][name] == bodies["fast"][name],
+            "speedup" : round(fast / validated, 2) if validated else None
+        }
+
+    result = {
+        "revision" : git_revision(),
+        "database" : engine.dialect.name,
+        "page_size" : PAGE,
+        "concurrency" : args.concurrency,
+        "seconds_per_run" : args.seconds,
+        "modes" : modes,
+        "comparison" : comparison
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent = 2)
+
+    print(json.dumps(comparison, indent = 2))
+    print(f"wrote {args.output}", file = sys.stderr)
+
+if __name__ == "__main__":
+    main()
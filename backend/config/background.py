@@ -0,0 +1,43 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class PeriodicTask:
+    # Runs fn every interval_seconds on a daemon thread until stopped. A
+    # failing run is logged and retried on the next tick.
+
+    def __init__(self, name : str, interval_seconds : float, fn):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.fn = fn
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target = self._loop, name = self.name, daemon = True)
+        self._thread.start()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def stop(self):
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.fn()
+            except Exception:
+                logger.exception("Background task %s failed", self.name)
+
+            self._stop.wait(self.interval_seconds)
@@ -0,0 +1,64 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+class ResultCache:
+    # Size-bounded LRU whose entries also expire at a fixed point in time.
+    # Keys are tuples whose first element is the owning report id, which lets
+    # every entry of a report be dropped at once.
+
+    def __init__(self, max_entries : int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._keys_by_report = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, now : datetime | None = None):
+        now = now or datetime.utcnow()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+
+            if expires_at <= now:
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at : datetime):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            self._keys_by_report.setdefault(key[0], set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def invalidate_report(self, report_id : int):
+        with self._lock:
+            for key in list(self._keys_by_report.get(report_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_report.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        report_keys = self._keys_by_report.get(key[0])
+
+        if report_keys is not None:
+            report_keys.discard(key)
+            if not report_keys:
+                del self._keys_by_report[key[0]]
@@ -0,0 +1,159 @@
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # only gzip is offered without it
+    brotli = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+# Complete bodies smaller than this are sent as they are
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+class GzipEncoder:
+    def __init__(self):
+        self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data : bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+class BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality = COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data : bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+# in order of preference when the client rates them equally
+ENCODERS = {"br" : BrotliEncoder, "gzip" : GzipEncoder} if brotli is not None else {"gzip" : GzipEncoder}
+
+def negotiate_encoding(accept_encoding : str):
+    # the supported coding with the highest q, None for identity
+    ratings = {}
+
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        ratings[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+
+    for coding in ENCODERS:
+        quality = ratings.get(coding, ratings.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+
+    return best
+
+def weaken_etag(headers : MutableHeaders):
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = "W/" + etag
+
+def compressible(headers : Headers, status : int):
+    if status < 200 or status in (204, 304) or "content-encoding" in headers:
+        return False
+    return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+class CompressionMiddleware:
+    # Pure ASGI, like QueryStatsMiddleware, so streamed exports are compressed
+    # chunk by chunk instead of being buffered. A single body under
+    # minimum_size goes out unchanged. Whenever a coding was negotiated the
+    # ETag is weak, on 304s and small bodies too, so a 304 always repeats the
+    # validator the full response carried.
+
+    def __init__(self, app, minimum_size : int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        coding = negotiate_encoding(Headers(scope = scope).get("accept-encoding", ""))
+
+        if coding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        encoder = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, encoder, passthrough
+
+            if message["type"] == "http.response.start":
+                start = message
+                headers = MutableHeaders(raw = list(message.get("headers", [])))
+
+                if message["status"] == 304:
+                    passthrough = True
+                    weaken_etag(headers)
+                    headers.add_vary_header("Accept-Encoding")
+                    return await send({**message, "headers" : headers.raw})
+
+                passthrough = not compressible(headers, message["status"])
+
+                if passthrough:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                return await send(message)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if encoder is None:
+                headers = MutableHeaders(raw = list(start.get("headers", [])))
+                headers.add_vary_header("Accept-Encoding")
+                weaken_etag(headers)
+
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send({**start, "headers" : headers.raw})
+                    return await send(message)
+
+                encoder = ENCODERS[coding]()
+                headers["Content-Encoding"] = coding
+                compressed = encoder.compress(body)
+
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    compressed += encoder.finish()
+                    headers["Content-Length"] = str(len(compressed))
+
+                await send({**start, "headers" : headers.raw})
+                return await send({"type" : "http.response.body", "body" : compressed, "more_body" : more_body})
+
+            compressed = encoder.compress(body)
+
+            if not more_body:
+                compressed += encoder.finish()
+
+            if compressed or not more_body:
+                await send({"type" : "http.response.body", "body" : compressed, "more_body" : more_body})
+
+        await self.app(scope, receive, send_compressed)
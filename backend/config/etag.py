@@ -0,0 +1,30 @@
+import hashlib
+from fastapi import HTTPException, status
+
+ETAG_HEADER = "ETag"
+
+def make_etag(*parts):
+    # strong validator: parts must pin down the exact representation sent
+    return '"' + hashlib.sha1(repr(parts).encode()).hexdigest() + '"'
+
+def versions_of(items):
+    # ORM objects or (id, version) rows, in page order
+    return [(item.id, item.version) for item in items]
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return etag in (candidate[2:] if candidate.startswith("W/") else candidate for candidate in candidates)
+
+def check_not_modified(if_none_match, etag):
+    if etag_matches(if_none_match, etag):
+        raise HTTPException(
+            status_code = status.HTTP_304_NOT_MODIFIED,
+            headers = {ETAG_HEADER : etag}
+        )
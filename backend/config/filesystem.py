@@ -0,0 +1,7 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Root directory for materialized report results
+REPORT_RESULTS_DIR = os.getenv("REPORT_RESULTS_DIR", os.path.join("storage", "results"))
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+from config.validation import ReportInterval
+
+def interval_bucket_start(interval : ReportInterval, now : datetime | None = None) -> datetime:
+    now = now or datetime.utcnow()
+
+    if interval == ReportInterval.hourly:
+        return now.replace(minute = 0, second = 0, microsecond = 0)
+    if interval == ReportInterval.daily:
+        return now.replace(hour = 0, minute = 0, second = 0, microsecond = 0)
+    if interval == ReportInterval.monthly:
+        return now.replace(day = 1, hour = 0, minute = 0, second = 0, microsecond = 0)
+    if interval == ReportInterval.annually:
+        return now.replace(month = 1, day = 1, hour = 0, minute = 0, second = 0, microsecond = 0)
+
+    raise ValueError(f"Unknown interval '{interval}'")
+
+def next_interval_boundary(interval : ReportInterval, now : datetime | None = None) -> datetime:
+    start = interval_bucket_start(interval, now)
+
+    if interval == ReportInterval.hourly:
+        return start + timedelta(hours = 1)
+    if interval == ReportInterval.daily:
+        return start + timedelta(days = 1)
+    if interval == ReportInterval.monthly:
+        if start.month == 12:
+            return start.replace(year = start.year + 1, month = 1)
+        return start.replace(month = start.month + 1)
+
+    return start.replace(year = start.year + 1)
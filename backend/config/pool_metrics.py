@@ -0,0 +1,65 @@
+import time
+import threading
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# Upper bounds (ms) of the checkout wait histogram; the last bucket is open
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_sum_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._lock = threading.Lock()
+
+    def observe_wait(self, wait_ms : float, timed_out : bool = False):
+        index = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if wait_ms <= bound), len(WAIT_BUCKETS_MS))
+
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_sum_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            self.wait_buckets[index] += 1
+
+    def snapshot(self, pool):
+        with self._lock:
+            buckets = list(self.wait_buckets)
+            counters = {
+                "checkouts" : self.checkouts,
+                "timeouts" : self.timeouts,
+                "wait_sum_ms" : round(self.wait_sum_ms, 3),
+                "wait_max_ms" : round(self.wait_max_ms, 3)
+            }
+
+        labels = [f"le_{bound}" for bound in WAIT_BUCKETS_MS] + ["le_inf"]
+
+        return {
+            "size" : pool.size(),
+            "checked_in" : pool.checkedin(),
+            "checked_out" : pool.checkedout(),
+            "overflow" : pool.overflow(),
+            **counters,
+            "wait_histogram_ms" : dict(zip(labels, buckets))
+        }
+
+def instrumented_pool_class(base_class, metrics : PoolMetrics):
+    # Pool.recreate() (engine.dispose()) builds a new pool of the same class,
+    # so the metrics ride on a per-engine subclass rather than the instance.
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+
+        try:
+            return base_class._do_get(self)
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            metrics.observe_wait((time.perf_counter() - started) * 1000, timed_out)
+
+    return type(f"Instrumented{base_class.__name__}", (base_class,), {"_do_get" : _do_get})
@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+logger = logging.getLogger("app.requests")
+
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "true").lower() == "true"
+# Requests issuing more statements than this are logged at WARNING; 0 disables
+QUERY_STATS_WARN_QUERIES = int(os.getenv("QUERY_STATS_WARN_QUERIES", "20"))
+
+_request_stats = ContextVar("request_query_stats", default = None)
+# open query_budget() blocks; they see statements from every thread
+_budget_stats = []
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration_ms = 0.0
+        self.statements = []
+
+    def observe(self, statement : str, duration_ms : float):
+        self.count += 1
+        self.duration_ms += duration_ms
+        self.statements.append(statement)
+
+class QueryBudgetExceeded(AssertionError):
+    def __init__(self, budget : int, stats : QueryStats):
+        listing = "\n".join(f"  {i}. {statement}" for i, statement in enumerate(stats.statements, 1))
+        super().__init__(f"Expected at most {budget} queries, got {stats.count}:\n{listing}")
+        self.budget = budget
+        self.stats = stats
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - conn.info["query_started"].pop()) * 1000
+    stats = _request_stats.get()
+
+    if stats is not None:
+        stats.observe(statement, duration_ms)
+
+    for budget_stats in _budget_stats:
+        budget_stats.observe(statement, duration_ms)
+
+def _handle_error(context):
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+
+    if started:
+        started.pop()
+
+def instrument_engine(engine):
+    # engine: a sync Engine, or AsyncEngine.sync_engine
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+def server_timing(stats : QueryStats, total_ms : float):
+    return f'db;dur={stats.duration_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+
+class QueryStatsMiddleware:
+    # Pure ASGI so the context var set here is the one sync routes see on
+    # their worker thread; the header carries the statements issued before
+    # the response started, the log line everything up to the last chunk.
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(stats, (time.perf_counter() - started) * 1000).encode()))
+                message = {**message, "headers" : headers}
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            _log_request(scope, status_code, stats, (time.perf_counter() - started) * 1000)
+
+def _log_request(scope, status_code, stats, total_ms):
+    over_budget = QUERY_STATS_WARN_QUERIES and stats.count > QUERY_STATS_WARN_QUERIES
+    level = logging.WARNING if over_budget else logging.INFO
+
+    if not logger.isEnabledFor(level):
+        return
+
+    route = scope.get("route")
+
+    logger.log(level, json.dumps({
+        "event" : "request",
+        "method" : scope["method"],
+        "path" : scope["path"],
+        "route" : getattr(route, "path", None),
+        "status" : status_code,
+        "queries" : stats.count,
+        "db_ms" : round(stats.duration_ms, 3),
+        "total_ms" : round(total_ms, 3)
+    }))
+
+@contextmanager
+def query_budget(budget : int):
+    # Test helper: fails when the block issues more than budget statements on
+    # an instrumented engine, in any thread (the test client runs the app in
+    # its own), e.g.
+    #   with query_budget(2):
+    #       client.get("/reports?include=columns", headers = headers)
+    stats = QueryStats()
+    _budget_stats.append(stats)
+
+    try:
+        yield stats
+    finally:
+        _budget_stats.remove(stats)
+
+    if stats.count > budget:
+        raise QueryBudgetExceeded(budget, stats)
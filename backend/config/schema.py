@@ -0,0 +1,15 @@
+from config.database import Base
+from config.search import ensure_search_index
+
+# every model, so create_all sees all of their tables
+from app.models.user import User
+from app.models.refresh_token import RefreshToken
+from app.models.reports import Reports
+from app.models.report_columns import ReportColumn
+from app.models.report_schedule import ReportSchedule
+
+def setup_schema(engine):
+    # Idempotent, run once per deploy before any worker starts
+    # (python serve.py setup); workers never issue DDL themselves.
+    Base.metadata.create_all(bind = engine)
+    ensure_search_index(engine)
@@ -0,0 +1,57 @@
+from sqlalchemy import inspect, text
+
+# Full-text indexes behind GET /reports/search. They are dialect specific, so
+# they are created here rather than declared on the models:
+#   MySQL  - FULLTEXT indexes on reports(title, description) and
+#            report_columns(name, description)
+#   SQLite - external-content FTS5 tables kept in sync by triggers
+
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(title, description, content = 'reports', content_rowid = 'id')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS report_columns_fts USING fts5(name, description, content = 'report_columns', content_rowid = 'id')"
+]
+
+def _sqlite_triggers(table, fts_table, columns):
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    delete_old = f"INSERT INTO {fts_table}({fts_table}, rowid, {names}) VALUES ('delete', old.id, {old_values});"
+    insert_new = f"INSERT INTO {fts_table}(rowid, {names}) VALUES (new.id, {new_values});"
+
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {names} ON {table} BEGIN {delete_old} {insert_new} END"
+    ]
+
+SQLITE_SEARCH_DDL += _sqlite_triggers("reports", "reports_fts", ["title", "description"])
+SQLITE_SEARCH_DDL += _sqlite_triggers("report_columns", "report_columns_fts", ["name", "description"])
+
+MYSQL_FULLTEXT_INDEXES = {
+    "reports" : ("ix_reports_fulltext", "title, description"),
+    "report_columns" : ("ix_report_columns_fulltext", "name, description")
+}
+
+def ensure_search_index(engine):
+    # Idempotent; run after the tables exist. Indexes created here are filled
+    # from the rows already present.
+    backend = engine.dialect.name
+
+    if backend == "sqlite":
+        with engine.begin() as conn:
+            existing = conn.scalar(text("SELECT COUNT(*) FROM sqlite_master WHERE name = 'reports_fts'"))
+
+            for statement in SQLITE_SEARCH_DDL:
+                conn.execute(text(statement))
+
+            if not existing:
+                conn.execute(text("INSERT INTO reports_fts(reports_fts) VALUES ('rebuild')"))
+                conn.execute(text("INSERT INTO report_columns_fts(report_columns_fts) VALUES ('rebuild')"))
+
+    elif backend == "mysql":
+        inspector = inspect(engine)
+
+        with engine.begin() as conn:
+            for table, (name, columns) in MYSQL_FULLTEXT_INDEXES.items():
+                if name not in {index["name"] for index in inspector.get_indexes(table)}:
+                    conn.execute(text(f"CREATE FULLTEXT INDEX {name} ON {table} ({columns})"))
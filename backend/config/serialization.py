@@ -0,0 +1,32 @@
+import os
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# List endpoints build their items straight from row tuples and encode them
+# with orjson, skipping the response_model pass over data that was already
+# validated when it was written. "false" restores the validated path.
+FAST_JSON_ENABLED = os.getenv("FAST_JSON_ENABLED", "true").lower() == "true"
+
+def _default(obj):
+    # items that still went through a schema, e.g. ?include=columns
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode = "json")
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default = _default)
+
+def row_items(rows, fields):
+    # rows select fields first, see row_columns()
+    return [dict(zip(fields, row)) for row in rows]
+
+def json_response(response, content):
+    # response: the route's injected Response, carrying the cursor and ETag headers
+    if not FAST_JSON_ENABLED:
+        return content
+
+    headers = {name : value for name, value in response.headers.items() if name != "content-length"}
+    return FastJSONResponse(content, status_code = response.status_code or 200, headers = headers)
@@ -0,0 +1,58 @@
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+class SingleFlightTimeout(Exception):
+    def __init__(self, timeout):
+        super().__init__(f"Timed out after {timeout}s waiting for a shared execution")
+        self.timeout = timeout
+
+class SingleFlightCancelled(Exception):
+    pass
+
+class SingleFlight:
+    # Concurrent calls with the same key share one execution: the first caller
+    # runs fn inline on the calling thread, later callers wait for its outcome.
+    # Only waiters are bound by timeout; the leader always runs fn to the end
+    # and never times out itself. A waiter that gives up only stops waiting;
+    # the execution still completes for everyone else. The key is forgotten
+    # once the call settles, so nothing is cached beyond the calls that
+    # overlapped it.
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, timeout : float | None = None):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+
+            if leader:
+                flight = Future()
+                self._flights[key] = flight
+
+        if leader:
+            self._run(key, flight, fn)
+
+        try:
+            return flight.result(timeout)
+        except FutureTimeoutError:
+            raise SingleFlightTimeout(timeout)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+    def _run(self, key, flight, fn):
+        try:
+            flight.set_result(fn())
+        except Exception as exc:
+            flight.set_exception(exc)
+        except BaseException:
+            # the leader was interrupted; waiters must not hang on it
+            flight.set_exception(SingleFlightCancelled("Shared execution was cancelled"))
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
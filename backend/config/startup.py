@@ -0,0 +1,55 @@
+import os
+import json
+import time
+import logging
+
+logger = logging.getLogger("app.startup")
+
+# reference point for the startup timings; server.py imports this module first
+STARTED_AT = time.perf_counter()
+
+# Connections each worker opens while starting, so the first requests do not
+# pay for the connects; capped at DB_POOL_SIZE, 0 disables
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", "2"))
+
+def mark_started():
+    # forked workers measure from the fork, not from the parent's import
+    global STARTED_AT
+    STARTED_AT = time.perf_counter()
+
+def elapsed_ms():
+    return round((time.perf_counter() - STARTED_AT) * 1000, 1)
+
+def warm_pool(engine, size : int):
+    connections = [engine.connect() for _ in range(size)]
+
+    for connection in connections:
+        connection.close()
+
+async def warm_async_pool(async_engine, size : int):
+    connections = [await async_engine.connect() for _ in range(size)]
+
+    for connection in connections:
+        await connection.close()
+
+def log_startup(event : str, **fields):
+    logger.info(json.dumps({"event" : event, "pid" : os.getpid(), "since_start_ms" : elapsed_ms(), **fields}))
+
+class FirstRequestMiddleware:
+    # Logs the worker's time to its first response, once
+    def __init__(self, app):
+        self.app = app
+        self.served = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.served:
+            return await self.app(scope, receive, send)
+
+        self.served = True
+
+        async def send_first(message):
+            if message["type"] == "http.response.start":
+                log_startup("first_request", path = scope["path"], status = message["status"])
+            await send(message)
+
+        await self.app(scope, receive, send_first)
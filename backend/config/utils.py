@@ -1,5 +1,11 @@
 import re
+import base64
+import binascii
 from uuid import uuid4
+from typing import Optional
+from fastapi import HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
 
 from app.models.reports import Reports
 from app.models.report_columns import ReportColumn
@@ -23,3 +29,136 @@ def get_owned_column(db, user_id, report_id, column_id):
     ).first()
 
     return report
+
+async def get_owned_report_async(db, report_id, user_id):
+    return (await db.execute(select(Reports).filter(
+        Reports.id == report_id,
+        Reports.user_id == user_id
+    ))).scalars().first()
+
+async def get_owned_column_async(db, user_id, report_id, column_id):
+    return (await db.execute(select(ReportColumn).join(Reports, ReportColumn.report_id == Reports.id).filter(
+        ReportColumn.id == column_id,
+        ReportColumn.report_id == report_id,
+        Reports.user_id == user_id
+    ))).scalars().first()
+
+def bump_version(entity):
+    # incremented in SQL so two concurrent writers never end on the same version
+    entity.version = type(entity).version + 1
+
+def encode_cursor(last_id : int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor : str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+def encode_rank_cursor(rank : float, last_id : int) -> str:
+    # repr keeps the float exact, so the next page resumes right after it
+    return base64.urlsafe_b64encode(f"{rank!r}:{last_id}".encode()).decode().rstrip("=")
+
+def decode_rank_cursor(cursor : str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, last_id = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        return float(rank), int(last_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+def encode_offset_cursor(view : str, offset : int) -> str:
+    # an offset is only meaningful within the exact view it was taken from
+    return base64.urlsafe_b64encode(f"{view}:{offset}".encode()).decode().rstrip("=")
+
+def decode_offset_cursor(cursor : str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        view, offset = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        offset = int(offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    return (view, offset) if offset >= 0 else None
+
+def get_after_id(after_id : Optional[int] = Query(None, ge = 1), cursor : Optional[str] = Query(None)):
+    # Dependency: the page boundary comes from after_id or an opaque cursor
+    if cursor is None:
+        return after_id
+
+    decoded = decode_cursor(cursor)
+
+    if decoded is None:
+        raise HTTPException(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            detail = "Invalid cursor"
+        )
+
+    return decoded
+
+def fields_param(allowed):
+    # Dependency factory: ?fields=id,title picks response fields out of allowed
+    allowed = list(allowed)
+
+    def get_fields(fields : Optional[str] = Query(None, description = f"Comma separated subset of: {', '.join(allowed)}")):
+        if fields is None:
+            return None
+
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = sorted(requested - set(allowed))
+
+        if unknown or not requested:
+            raise HTTPException(
+                status_code = status.HTTP_400_BAD_REQUEST,
+                detail = f"Unknown fields: {', '.join(unknown)}" if unknown else "No fields requested"
+            )
+
+        # declared order, so equal selections share ETags
+        return tuple(name for name in allowed if name in requested)
+
+    return get_fields
+
+def load_fields(query, model, fields):
+    # Only the selected columns are read from the database; id and version
+    # always are, since keyset pages and ETags are built from them.
+    if fields is None:
+        return query
+
+    names = dict.fromkeys(("id", "version") + tuple(fields))
+    return query.options(load_only(*[getattr(model, name) for name in names]))
+
+def row_columns(model, fields):
+    # fields in order, then id and version when missing, for cursors and ETags
+    names = tuple(fields) + tuple(name for name in ("id", "version") if name not in fields)
+    return [getattr(model, name) for name in names]
+
+def keyset_page(query, id_column, limit, offset, after_id = None):
+    # Newest first. With after_id the page starts right below that id and the
+    # offset is ignored, so deep pages cost the same as the first one.
+    query = query.order_by(id_column.desc())
+
+    if after_id is not None:
+        query = query.filter(id_column < after_id)
+    else:
+        query = query.offset(offset)
+
+    rows = query.limit(limit + 1).all()
+    return _keyset_result(rows, limit)
+
+async def keyset_page_async(db, statement, id_column, limit, offset, after_id = None, scalars = True):
+    statement = statement.order_by(id_column.desc())
+
+    if after_id is not None:
+        statement = statement.filter(id_column < after_id)
+    else:
+        statement = statement.offset(offset)
+
+    result = await db.execute(statement.limit(limit + 1))
+    rows = result.scalars().all() if scalars else result.all()
+    return _keyset_result(rows, limit)
+
+def _keyset_result(rows, limit):
+    next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
@@ -16,4 +16,11 @@ class ReportStatus(str, Enum):
 
 class UserRole(str, Enum):
     user = "user"
-    admin = "admin"
\ No newline at end of file
+    admin = "admin"
+
+class ReportInclude(str, Enum):
+    columns = "columns"
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Depends
+
+from config.database import get_pool_stats
+from app.auth.dependencies import require_admin
+
+router = APIRouter(prefix = "/admin", tags = ["Admin"])
+
+# live connection pool usage, for sizing DB_POOL_SIZE / DB_MAX_OVERFLOW
+@router.get("/db/pool")
+def pool_stats(admin = Depends(require_admin)):
+    return get_pool_stats()
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends
+from app.schemas.user import UserResponse, UserCreate, Token, RefreshTokenRequest
+from config.database import get_async_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.auth.async_auth_controller import signup_controller, login_controller, refresh_controller, logout_controller
+from fastapi.security import OAuth2PasswordRequestForm
+
+
+router = APIRouter(prefix = "/auth", tags = ["Authentication"])
+
+@router.post("/signup", response_model = UserResponse)
+async def signup(payload : UserCreate, db : AsyncSession = Depends(get_async_db)):   
+    return await signup_controller(db, payload)
+
+@router.post("/login", response_model = Token)
+async def login(form_data : OAuth2PasswordRequestForm = Depends(), db : AsyncSession = Depends(get_async_db)):
+    return await login_controller(db, form_data)
+
+@router.post("/refresh", response_model=Token)
+async def refresh(payload: RefreshTokenRequest, db : AsyncSession = Depends(get_async_db)):
+    return await refresh_controller(db, payload)
+
+@router.post("/logout")
+async def logout(payload : RefreshTokenRequest , db : AsyncSession = Depends(get_async_db)):
+    return await logout_controller(db, payload)
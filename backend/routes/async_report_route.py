@@ -0,0 +1,115 @@
+from fastapi import APIRouter, Depends, Header, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.database import get_async_db
+from config.utils import get_after_id
+from config.serialization import json_response
+from typing import Optional, Union
+from app.schemas.report import ReportCreate, ReportResponse, ReportWithColumnsResponse, ReportFieldsResponse, ReportSearchResponse, ReportUpdate
+from app.schemas.report import ReportColumnCreate, ReportColumnUpdate, ReportColumnResponse, ReportColumnFieldsResponse
+from app.schemas.report import ReportColumnBatch, ReportColumnBatchResponse
+from app.auth.dependencies import get_current_user_async, require_admin_async
+from routes.report_route import set_next_cursor, set_etag, report_fields, column_fields
+from config.validation import ReportInclude
+from app.controller.async_report_controller import (
+    create_report_controller, 
+    get_report_controller, 
+    get_all_reports_controller,
+    search_reports_controller,
+    get_report_by_id_controller, 
+    update_report_controller,
+    delete_report_controller
+)
+
+from app.controller.async_report_column_controller import (
+    create_report_column_controller,
+    read_report_column_controller,
+    read_report_column_by_id_controller,
+    update_report_column_controller,
+    delete_report_column_controller,
+    batch_report_columns_controller
+)
+
+router = APIRouter(tags = ["Reports"])
+
+# CREATE
+@router.post("/reports", response_model = ReportResponse)
+async def create_report(payload: ReportCreate, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user_async)):
+    return await create_report_controller(db, payload, current_user)
+
+# READ
+@router.get("/reports", response_model = list[Union[ReportWithColumnsResponse, ReportResponse, ReportFieldsResponse]], response_model_exclude_unset = True)
+async def get_reports(response : Response, limit : int = Query(10, ge = 1, le = 100), offset : int = Query(0, ge = 0), after_id = Depends(get_after_id), include : Optional[ReportInclude] = Query(None), fields = Depends(report_fields), if_none_match : Optional[str] = Header(None), db : AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user_async)):
+    report, next_cursor, etag = await get_report_controller(db, current_user, limit, offset, after_id, include, if_none_match, fields)
+    set_next_cursor(response, next_cursor)
+    set_etag(response, etag)
+    return json_response(response, report)
+
+# SEARCH: declared before /reports/{report_id} so "search" is not taken for an id
+@router.get("/reports/search", response_model = list[ReportSearchResponse])
+async def search_reports(response : Response, q : str = Query(..., min_length = 1, max_length = 200), limit : int = Query(10, ge = 1, le = 100), cursor : Optional[str] = Query(None), db : AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user_async)):
+    results, next_cursor = await search_reports_controller(db, current_user, q, limit, cursor)
+    set_next_cursor(response, next_cursor)
+    return results
+
+@router.get("/reports/{report_id}", response_model = Union[ReportWithColumnsResponse, ReportResponse])
+async def get_report_by_id(report_id : int, response : Response, include : Optional[ReportInclude] = Query(None), if_none_match : Optional[str] = Header(None), db : AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user_async)):
+    report, etag = await get_report_by_id_controller(db, current_user, report_id, include, if_none_match)
+    set_etag(response, etag)
+    return report
+
+# UPDATE
+@router.put("/reports/{report_id}", response_model = ReportResponse)
+async def update_report(report_id : int, payload : ReportUpdate, db : AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user_async)):
+    return await update_report_controller(db, report_id, current_user, payload)
+
+# DELETE
+@router.delete("/reports/{report_id}")
+async def delete_report(report_id : int, db : AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user_async)):
+    return await delete_report_controller(db, report_id, current_user)
+
+# ----------------- Report Column ------------------
+
+# CREATE
+@router.post("/reports/{report_id}/columns", response_model = ReportColumnResponse)
+async def create_report_column(payload : ReportColumnCreate, report_id : int, db : AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user_async)):
+    return await create_report_column_controller(db, payload, current_user, report_id)
+
+# BATCH: all operations in one transaction, all-or-nothing
+@router.post("/reports/{report_id}/columns/batch", response_model = ReportColumnBatchResponse)
+async def batch_report_columns(report_id : int, payload : ReportColumnBatch, db : AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user_async)):
+    return await batch_report_columns_controller(db, report_id, current_user, payload)
+
+#READ
+@router.get("/reports/{report_id}/columns", response_model = list[Union[ReportColumnResponse, ReportColumnFieldsResponse]], response_model_exclude_unset = True)
+async def read_report_column(report_id : int, response : Response, limit : int  = Query(10, ge = 1, le = 100), offset : int = Query(0, ge = 0), after_id = Depends(get_after_id), fields = Depends(column_fields), if_none_match : Optional[str] = Header(None), db : AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user_async)):
+    report_column, next_cursor, etag = await read_report_column_controller(db, report_id, current_user, limit, offset, after_id, if_none_match, fields)
+    set_next_cursor(response, next_cursor)
+    set_etag(response, etag)
+    return json_response(response, report_column)
+
+# by id
+@router.get("/reports/{report_id}/columns/{column_id}", response_model = ReportColumnResponse)
+async def read_report_column_by_id(report_id : int, column_id : int, response : Response, if_none_match : Optional[str] = Header(None), db : AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user_async)):
+    report_column, etag = await read_report_column_by_id_controller(db, report_id, column_id, current_user, if_none_match)
+    set_etag(response, etag)
+    return report_column
+
+#UPDATE
+@router.put("/reports/{report_id}/columns/{column_id}", response_model = ReportColumnResponse)
+async def update_report_column(report_id : int, column_id : int, payload : ReportColumnUpdate, db : AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user_async)):
+    return await update_report_column_controller(db, payload, report_id, column_id, current_user)
+
+#DELETE
+@router.delete("/reports/{report_id}/columns/{column_id}")
+async def delete_report_column(report_id : int, column_id : int, db : AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user_async)):
+    return await delete_report_column_controller(db, report_id, column_id, current_user)
+
+
+# ADMIN - ONLY ROUTES
+@router.get("/admin/reports", response_model = list[ReportResponse])
+async def get_all_reports(response : Response, limit : int  = Query(10, ge = 1, le = 100), offset : int = Query(0, ge = 0), after_id = Depends(get_after_id), if_none_match : Optional[str] = Header(None), db : AsyncSession = Depends(get_async_db), admin  = Depends(require_admin_async)):
+    reports, next_cursor, etag = await get_all_reports_controller(db, limit, offset, after_id, if_none_match)
+    set_next_cursor(response, next_cursor)
+    set_etag(response, etag)
+    return json_response(response, reports)
@@ -1,17 +1,29 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query, Response
 from sqlalchemy.orm import Session
 
 from config.database import get_db
-from app.schemas.report import ReportCreate, ReportResponse, ReportUpdate
-from app.schemas.report import ReportColumnCreate, ReportColumnUpdate, ReportColumnResponse
+from config.utils import get_after_id, fields_param
+from config.etag import ETAG_HEADER
+from config.serialization import json_response
+from datetime import datetime
+from typing import List, Optional, Union
+from app.schemas.report import ReportCreate, ReportResponse, ReportWithColumnsResponse, ReportFieldsResponse, ReportSearchResponse, ReportUpdate, ReportRunRequest, ReportRunResponse, ReportResultPageResponse
+from app.schemas.report import ReportColumnCreate, ReportColumnUpdate, ReportColumnResponse, ReportColumnFieldsResponse
+from app.schemas.report import ReportColumnBatch, ReportColumnBatchResponse, REPORT_FIELDS, REPORT_COLUMN_FIELDS
 from app.auth.dependencies import get_current_user, require_admin
-from app.models.reports import Reports
+from config.validation import ExportFormat, ReportInclude
 from app.controller.report_controller import (
     create_report_controller, 
     get_report_controller, 
+    get_all_reports_controller,
+    search_reports_controller,
     get_report_by_id_controller, 
     update_report_controller,
-    delete_report_controller
+    delete_report_controller,
+    run_report_controller,
+    export_report_controller,
+    rebuild_report_controller,
+    get_report_results_controller
 )
 
 from app.controller.report_column_controller import (
@@ -19,10 +31,26 @@ from app.controller.report_column_controller import (
     read_report_column_controller,
     read_report_column_by_id_controller,
     update_report_column_controller,
-    delete_report_column_controller
+    delete_report_column_controller,
+    batch_report_columns_controller
 )
 
 router = APIRouter(tags = ["Reports"])
+# run/export stay on threads in both DB modes, see server.py
+execution_router = APIRouter(tags = ["Reports"])
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def set_next_cursor(response, next_cursor):
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+def set_etag(response, etag):
+    response.headers[ETAG_HEADER] = etag
+
+# ?fields= for the list endpoints
+report_fields = fields_param(REPORT_FIELDS)
+column_fields = fields_param(REPORT_COLUMN_FIELDS)
 
 # CREATE
 @router.post("/reports", response_model = ReportResponse)
@@ -31,15 +59,26 @@ def create_report(payload: ReportCreate, db: Session = Depends(get_db), current_
     return report
 
 # READ
-@router.get("/reports", response_model = list[ReportResponse])
-def get_reports(limit : int = Query(10, ge = 1, le = 100), offset : int = Query(0, ge = 0), db : Session = Depends(get_db), current_user = Depends(get_current_user)):
-    report = get_report_controller(db, current_user, limit, offset)
+@router.get("/reports", response_model = list[Union[ReportWithColumnsResponse, ReportResponse, ReportFieldsResponse]], response_model_exclude_unset = True)
+def get_reports(response : Response, limit : int = Query(10, ge = 1, le = 100), offset : int = Query(0, ge = 0), after_id = Depends(get_after_id), include : Optional[ReportInclude] = Query(None), fields = Depends(report_fields), if_none_match : Optional[str] = Header(None), db : Session = Depends(get_db), current_user = Depends(get_current_user)):
+    report, next_cursor, etag = get_report_controller(db, current_user, limit, offset, after_id, include, if_none_match, fields)
+    set_next_cursor(response, next_cursor)
+    set_etag(response, etag)
+    return json_response(response, report)
+
+# SEARCH: declared before /reports/{report_id} so "search" is not taken for an id
+@router.get("/reports/search", response_model = list[ReportSearchResponse])
+def search_reports(response : Response, q : str = Query(..., min_length = 1, max_length = 200), limit : int = Query(10, ge = 1, le = 100), cursor : Optional[str] = Query(None), db : Session = Depends(get_db), current_user = Depends(get_current_user)):
+    results, next_cursor = search_reports_controller(db, current_user, q, limit, cursor)
+    set_next_cursor(response, next_cursor)
+    return results
+
+@router.get("/reports/{report_id}", response_model = Union[ReportWithColumnsResponse, ReportResponse])
+def get_report_by_id(report_id : int, response : Response, include : Optional[ReportInclude] = Query(None), if_none_match : Optional[str] = Header(None), db : Session = Depends(get_db), current_user = Depends(get_current_user)):
+    report, etag = get_report_by_id_controller(db, current_user, report_id, include, if_none_match)
+    set_etag(response, etag)
     return report
 
-@router.get("/reports/{report_id}", response_model = ReportResponse)
-def get_report_by_id(report_id : int, db : Session = Depends(get_db), current_user = Depends(get_current_user)):
-    return get_report_by_id_controller(db, current_user, report_id)
-
 # UPDATE
 @router.put("/reports/{report_id}", response_model = ReportResponse)
 def update_report(report_id : int, payload : ReportUpdate, db : Session = Depends(get_db), current_user = Depends(get_current_user)):
@@ -50,6 +89,29 @@ def update_report(report_id : int, payload : ReportUpdate, db : Session = Depend
 def delete_report(report_id : int, db : Session = Depends(get_db), current_user = Depends(get_current_user)):
     return delete_report_controller(db, report_id, current_user)
 
+# RUN
+@execution_router.post("/reports/{report_id}/run", response_model = ReportRunResponse)
+def run_report(report_id : int, payload : Optional[ReportRunRequest] = None, db : Session = Depends(get_db), current_user = Depends(get_current_user)):
+    return run_report_controller(db, report_id, current_user, payload)
+
+# EXPORT
+@execution_router.get("/reports/{report_id}/export")
+def export_report(report_id : int, export_format : ExportFormat = Query(ExportFormat.csv, alias = "format"), db : Session = Depends(get_db), current_user = Depends(get_current_user)):
+    return export_report_controller(db, report_id, current_user, export_format)
+
+# REBUILD: recompute a cached report from scratch, ignoring watermarks
+@execution_router.post("/reports/{report_id}/rebuild", response_model = ReportRunResponse)
+def rebuild_report(report_id : int, db : Session = Depends(get_db), current_user = Depends(get_current_user)):
+    return rebuild_report_controller(db, report_id, current_user)
+
+# RESULTS: one page of a cached report's stored result, sorted and filtered server-side
+@execution_router.get("/reports/{report_id}/results", response_model = ReportResultPageResponse)
+def get_report_results(report_id : int, response : Response, limit : int = Query(100, ge = 1, le = 1000), cursor : Optional[str] = Query(None), sort : Optional[str] = Query(None), filters : Optional[List[str]] = Query(None, alias = "filter"), columns : Optional[str] = Query(None), at : Optional[datetime] = Query(None), if_none_match : Optional[str] = Header(None), db : Session = Depends(get_db), current_user = Depends(get_current_user)):
+    page, next_cursor, etag = get_report_results_controller(db, report_id, current_user, limit, cursor, sort, filters, columns, at, if_none_match)
+    set_next_cursor(response, next_cursor)
+    set_etag(response, etag)
+    return page
+
 # ----------------- Report Column ------------------
 
 # CREATE
@@ -57,15 +119,25 @@ def delete_report(report_id : int, db : Session = Depends(get_db), current_user
 def create_report_column(payload : ReportColumnCreate, report_id : int, db : Session = Depends(get_db), current_user = Depends(get_current_user)):
     return create_report_column_controller(db, payload, current_user, report_id)
 
+# BATCH: all operations in one transaction, all-or-nothing
+@router.post("/reports/{report_id}/columns/batch", response_model = ReportColumnBatchResponse)
+def batch_report_columns(report_id : int, payload : ReportColumnBatch, db : Session = Depends(get_db), current_user = Depends(get_current_user)):
+    return batch_report_columns_controller(db, report_id, current_user, payload)
+
 #READ
-@router.get("/reports/{report_id}/columns", response_model = list[ReportColumnResponse])
-def read_report_column(report_id : int, limit : int  = Query(10, ge = 1, le = 100), offset : int = Query(0, ge = 0), db : Session = Depends(get_db), current_user = Depends(get_current_user)):
-    return read_report_column_controller(db, report_id, current_user, limit, offset)
+@router.get("/reports/{report_id}/columns", response_model = list[Union[ReportColumnResponse, ReportColumnFieldsResponse]], response_model_exclude_unset = True)
+def read_report_column(report_id : int, response : Response, limit : int  = Query(10, ge = 1, le = 100), offset : int = Query(0, ge = 0), after_id = Depends(get_after_id), fields = Depends(column_fields), if_none_match : Optional[str] = Header(None), db : Session = Depends(get_db), current_user = Depends(get_current_user)):
+    report_column, next_cursor, etag = read_report_column_controller(db, report_id, current_user, limit, offset, after_id, if_none_match, fields)
+    set_next_cursor(response, next_cursor)
+    set_etag(response, etag)
+    return json_response(response, report_column)
 
 # by id
 @router.get("/reports/{report_id}/columns/{column_id}", response_model = ReportColumnResponse)
-def read_report_column_by_id(report_id : int, column_id : int, db : Session = Depends(get_db), current_user = Depends(get_current_user)):
-    return read_report_column_by_id_controller(db, report_id, column_id, current_user)
+def read_report_column_by_id(report_id : int, column_id : int, response : Response, if_none_match : Optional[str] = Header(None), db : Session = Depends(get_db), current_user = Depends(get_current_user)):
+    report_column, etag = read_report_column_by_id_controller(db, report_id, column_id, current_user, if_none_match)
+    set_etag(response, etag)
+    return report_column
 
 #UPDATE
 @router.put("/reports/{report_id}/columns/{column_id}", response_model = ReportColumnResponse)
@@ -80,5 +152,8 @@ def delete_report_column(report_id : int, column_id : int, db : Session = Depend
 
 # ADMIN - ONLY ROUTES
 @router.get("/admin/reports", response_model = list[ReportResponse])
-def get_all_reports(limit : int  = Query(10, ge = 1, le = 100), offset : int = Query(0, ge = 0), db : Session = Depends(get_db), admin  = Depends(require_admin)):
-    return db.query(Reports).order_by(Reports.id.desc()).offset(offset).limit(limit).all()
+def get_all_reports(response : Response, limit : int  = Query(10, ge = 1, le = 100), offset : int = Query(0, ge = 0), after_id = Depends(get_after_id), if_none_match : Optional[str] = Header(None), db : Session = Depends(get_db), admin  = Depends(require_admin)):
+    reports, next_cursor, etag = get_all_reports_controller(db, limit, offset, after_id, if_none_match)
+    set_next_cursor(response, next_cursor)
+    set_etag(response, etag)
+    return json_response(response, reports)
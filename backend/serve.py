@@ -0,0 +1,144 @@
+import os
+import sys
+import copy
+import time
+import signal
+import logging
+import argparse
+
+import uvicorn
+from uvicorn.config import LOGGING_CONFIG
+
+# Production entry point:
+#   python serve.py setup                  # once per deploy: tables and search indexes
+#   python serve.py run --workers 4        # then per container, any number of times
+#
+# run imports server:app once in the parent, which opens no database
+# connection, then forks the workers onto one listening socket. A worker
+# starts with the app already imported: it drops the pools it inherited,
+# warms its own in the lifespan and logs its startup timings on the
+# "app.startup" logger. Where fork is unavailable uvicorn's spawned workers
+# are used instead, each importing the app itself.
+
+logger = logging.getLogger("app.startup")
+
+# A worker exiting sooner than this after its fork is not restarted
+WORKER_MIN_UPTIME_SECONDS = 1
+
+def setup():
+    from config.database import engine
+    from config.schema import setup_schema
+
+    setup_schema(engine)
+    engine.dispose()
+
+def log_config():
+    config = copy.deepcopy(LOGGING_CONFIG)
+    # app.requests only logs requests over the query budget at this level
+    config["loggers"]["app"] = {"handlers" : ["default"], "level" : "WARNING", "propagate" : False}
+    config["loggers"]["app.startup"] = {"level" : "INFO"}
+    return config
+
+def serve_worker(config, sock):
+    from config.startup import mark_started
+    from config.database import engine, async_engine
+
+    mark_started()
+    # inherited pools are empty, but must not be shared with the parent anyway
+    engine.dispose(close = False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close = False)
+
+    server = uvicorn.Server(config)
+    server.run(sockets = [sock])
+    # False when the lifespan startup failed
+    return server.started
+
+def run_forked(host, port, workers):
+    config = uvicorn.Config("server:app", host = host, port = port, log_config = log_config(), proxy_headers = True)
+
+    started = time.perf_counter()
+    config.load()
+    logger.info(f"imported server:app in {(time.perf_counter() - started) * 1000:.0f}ms, forking {workers} workers")
+
+    sock = config.bind_socket()
+    children = {}
+    stopping = False
+
+    def fork_worker():
+        pid = os.fork()
+
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 1
+            try:
+                code = 0 if serve_worker(config, sock) else 1
+            except BaseException:
+                logger.exception("worker failed")
+            finally:
+                os._exit(code)
+
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        fork_worker()
+
+    failed = False
+
+    while children:
+        pid, status = os.wait()
+        forked_at = children.pop(pid, None)
+        code = os.waitstatus_to_exitcode(status)
+
+        if stopping or forked_at is None:
+            continue
+
+        if time.monotonic() - forked_at < WORKER_MIN_UPTIME_SECONDS:
+            logger.error(f"worker {pid} exited during startup (exit code {code}), stopping")
+            failed = True
+            stop(None, None)
+        else:
+            logger.warning(f"worker {pid} exited (exit code {code}), restarting it")
+            fork_worker()
+
+    sock.close()
+
+    if failed:
+        sys.exit(1)
+
+def run(host, port, workers):
+    if hasattr(os, "fork"):
+        return run_forked(host, port, workers)
+
+    uvicorn.run("server:app", host = host, port = port, workers = workers, log_config = log_config(), proxy_headers = True)
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest = "command", required = True)
+    commands.add_parser("setup", help = "create missing tables and search indexes, then exit")
+
+    run_parser = commands.add_parser("run", help = "start the workers; the schema must already exist")
+    run_parser.add_argument("--host", default = os.getenv("HOST", "0.0.0.0"))
+    run_parser.add_argument("--port", type = int, default = int(os.getenv("PORT", "8000")))
+    run_parser.add_argument("--workers", type = int, default = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+
+    args = parser.parse_args()
+
+    if args.command == "setup":
+        setup()
+    else:
+        run(args.host, args.port, args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,67 @@
-from config.database import engine, Base 
-from app.models.reports import Reports
-from app.models.report_columns import ReportColumn
+from config.startup import FirstRequestMiddleware, DB_POOL_WARM, warm_pool, warm_async_pool, log_startup
+from config.database import engine, async_engine, DB_MODE, DB_POOL_SIZE
+from app.services.report_scheduler_service import report_scheduler, SCHEDULER_ENABLED
+from app.auth.auth_service import refresh_token_purger, REFRESH_TOKEN_PURGE_SECONDS
+from config.connections import connection_registry, connection_sweeper, REPORT_CONNECTIONS_SWEEP_SECONDS
+from config.query_stats import QueryStatsMiddleware, QUERY_STATS_ENABLED, instrument_engine
+from config.compression import CompressionMiddleware, COMPRESSION_ENABLED
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routes.report_route import router as report_router
+from routes.report_route import router as report_router, execution_router
 from routes.auth_route import router as auth_router
+from routes.async_report_route import router as async_report_router
+from routes.async_auth_route import router as async_auth_router
+from routes.admin_route import router as admin_router
 
-Base.metadata.create_all(bind=engine)
+# Importing this module has no side effects on the database: the schema is
+# set up beforehand (python serve.py setup) and pools fill in each worker.
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+	warm = min(DB_POOL_WARM, DB_POOL_SIZE)
+	if warm > 0:
+		warm_pool(engine, warm)
+		if async_engine is not None:
+			await warm_async_pool(async_engine, warm)
+	if SCHEDULER_ENABLED:
+		report_scheduler.start()
+	if REFRESH_TOKEN_PURGE_SECONDS > 0:
+		refresh_token_purger.start()
+	if REPORT_CONNECTIONS_SWEEP_SECONDS > 0:
+		connection_sweeper.start()
+	log_startup("ready", warmed_connections = warm)
+	yield
+	refresh_token_purger.stop()
+	report_scheduler.stop()
+	connection_sweeper.stop()
+	connection_registry.dispose_all()
+	if async_engine is not None:
+		await async_engine.dispose()
+
+app = FastAPI(lifespan = lifespan)
 app.add_middleware(
 	CORSMiddleware,
 	allow_origins=["http://localhost:9000"],
 	allow_credentials=True,
 	allow_methods=["*"],
 	allow_headers=["*"],
+	expose_headers=["X-Next-Cursor", "ETag"],
 )
-app.include_router(report_router)
-app.include_router(auth_router)
\ No newline at end of file
+app.add_middleware(FirstRequestMiddleware)
+if COMPRESSION_ENABLED:
+	app.add_middleware(CompressionMiddleware)
+if QUERY_STATS_ENABLED:
+	instrument_engine(engine)
+	if async_engine is not None:
+		instrument_engine(async_engine.sync_engine)
+	# outermost, so the timing covers every other middleware
+	app.add_middleware(QueryStatsMiddleware)
+if DB_MODE == "async":
+	app.include_router(async_report_router)
+	app.include_router(async_auth_router)
+else:
+	app.include_router(report_router)
+	app.include_router(auth_router)
+app.include_router(execution_router)
+app.include_router(admin_router)
\ No newline at end of file
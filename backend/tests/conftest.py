@@ -0,0 +1,74 @@
+import os
+import json
+import sqlite3
+import tempfile
+from uuid import uuid4
+
+import pytest
+
+# The app reads its settings when imported, so they are set before any test
+# module imports it: a throwaway SQLite app database, one SQLite source and
+# no background scheduler. DB_MODE is left to the caller (sync by default).
+WORKDIR = tempfile.mkdtemp(prefix = "reportslist-tests-")
+SOURCE_PATH = os.path.join(WORKDIR, "source.db")
+
+os.environ.update({
+    "DATABASE_URL" : f"sqlite:///{os.path.join(WORKDIR, 'app.db')}",
+    "REPORT_CONNECTIONS" : json.dumps({"source" : f"sqlite:///{SOURCE_PATH}"}),
+    "REPORT_RESULTS_DIR" : os.path.join(WORKDIR, "results"),
+    "SCHEDULER_ENABLED" : "false"
+})
+os.environ.setdefault("SECRET_KEY", "test-secret-key-0123456789abcdef")
+os.environ.setdefault("DB_MODE", "sync")
+
+PASSWORD = "password123"
+
+def seed_source():
+    conn = sqlite3.connect(SOURCE_PATH)
+    conn.execute("CREATE TABLE IF NOT EXISTS sales (id INTEGER PRIMARY KEY, amount INTEGER, region TEXT)")
+    conn.executemany(
+        "INSERT INTO sales (amount, region) VALUES (?, ?)",
+        [(i, "EU" if i % 2 else "US") for i in range(1, 101)]
+    )
+    conn.commit()
+    conn.close()
+
+@pytest.fixture(scope = "session")
+def client():
+    from fastapi.testclient import TestClient
+    from config.database import engine
+    from config.schema import setup_schema
+    from server import app
+
+    seed_source()
+    setup_schema(engine)
+
+    with TestClient(app) as client:
+        yield client
+
+def signup_and_login(client, role = "user"):
+    email = f"user-{uuid4().hex[:8]}@example.com"
+    response = client.post("/auth/signup", json = {"email" : email, "password" : PASSWORD, "role" : role})
+    assert response.status_code == 200, response.text
+
+    response = client.post("/auth/login", data = {"username" : email, "password" : PASSWORD})
+    assert response.status_code == 200, response.text
+
+    return email, response.json()
+
+@pytest.fixture
+def headers(client):
+    # a fresh user for every test
+    _, tokens = signup_and_login(client)
+    return {"Authorization" : f"Bearer {tokens['access_token']}"}
+
+@pytest.fixture
+def report(client, headers):
+    response = client.post("/reports", headers = headers, json = {
+        "title" : "Sales by region",
+        "type" : "realtime",
+        "interval" : "daily",
+        "status" : "active"
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
@@ -0,0 +1,54 @@
+import os
+import sys
+import asyncio
+import subprocess
+
+import pytest
+
+from config.database import DB_MODE, async_engine
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The app picks its routes and engines when imported, so the async mode runs
+# the whole suite again in a pytest of its own against sqlite+aiosqlite.
+@pytest.mark.skipif(DB_MODE == "async", reason = "already running in async mode")
+def test_suite_passes_in_async_mode():
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider"],
+        cwd = BACKEND_DIR,
+        env = {**os.environ, "DB_MODE" : "async"},
+        capture_output = True,
+        text = True
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+
+requires_async = pytest.mark.skipif(DB_MODE != "async", reason = "needs DB_MODE=async")
+
+@requires_async
+def test_async_engine_uses_aiosqlite(client):
+    assert async_engine.url.drivername == "sqlite+aiosqlite"
+
+@requires_async
+def test_cache_invalidation_runs_off_the_event_loop(client, headers, report, monkeypatch):
+    from app.services import async_report_service, async_report_column_service
+    calls = []
+
+    def record(report_id):
+        try:
+            asyncio.get_running_loop()
+            calls.append("event loop")
+        except RuntimeError:
+            calls.append("thread")
+
+    monkeypatch.setattr(async_report_service, "invalidate_report_cache", record)
+    monkeypatch.setattr(async_report_service, "drop_report_cache", record)
+    monkeypatch.setattr(async_report_column_service, "invalidate_report_cache", record)
+
+    column = client.post(f"/reports/{report['id']}/columns", headers = headers, json = {
+        "name" : "amount", "status" : "active", "query" : "SELECT amount FROM sales", "connection_id" : "source"
+    }).json()
+    client.put(f"/reports/{report['id']}/columns/{column['id']}", headers = headers, json = {"description" : "edited"})
+    client.put(f"/reports/{report['id']}", headers = headers, json = {"description" : "edited"})
+    client.delete(f"/reports/{report['id']}", headers = headers)
+
+    assert calls == ["thread"] * 4
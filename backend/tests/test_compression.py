@@ -0,0 +1,30 @@
+import pytest
+
+@pytest.mark.parametrize("limit", [1, 50])
+def test_304_repeats_the_validator_of_the_encoded_response(client, headers, limit):
+    # one small report stays under COMPRESSION_MIN_SIZE, fifty go out compressed
+    for i in range(limit):
+        client.post("/reports", headers = headers, json = {
+            "title" : f"Report {i}", "type" : "realtime", "interval" : "daily", "status" : "active",
+            "description" : "Monthly sales broken down by region and product line"
+        })
+    gzip = {**headers, "Accept-Encoding" : "gzip"}
+
+    response = client.get(f"/reports?limit={limit}", headers = gzip)
+    etag = response.headers["ETag"]
+    assert etag.startswith("W/")
+    assert (response.headers.get("Content-Encoding") == "gzip") == (limit > 1)
+
+    response = client.get(f"/reports?limit={limit}", headers = {**gzip, "If-None-Match" : etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+def test_identity_keeps_the_strong_validator(client, headers, report):
+    response = client.get(f"/reports/{report['id']}", headers = {**headers, "Accept-Encoding" : "identity"})
+    etag = response.headers["ETag"]
+    assert not etag.startswith("W/")
+
+    response = client.get(f"/reports/{report['id']}", headers = {**headers, "Accept-Encoding" : "identity", "If-None-Match" : etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
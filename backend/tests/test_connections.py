@@ -0,0 +1,24 @@
+import time
+
+from config.background import PeriodicTask
+from config.connections import ConnectionRegistry, connection_sweeper
+from conftest import SOURCE_PATH
+
+def test_sweep_disposes_idle_engines_without_further_lookups():
+    registry = ConnectionRegistry({"source" : f"sqlite:///{SOURCE_PATH}"}, idle_seconds = 0.05)
+    registry.get_engine("source")
+    assert len(registry) == 1
+
+    sweeper = PeriodicTask("test-connection-sweep", 0.01, registry.evict_idle)
+    sweeper.start()
+    try:
+        deadline = time.monotonic() + 2
+        while len(registry) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        sweeper.stop()
+
+    assert len(registry) == 0
+
+def test_sweeper_runs_with_the_app(client):
+    assert connection_sweeper.running
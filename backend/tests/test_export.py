@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+
+from app.services.report_execution_service import REPORT_MAX_PER_CONNECTION
+
+def add_column(client, headers, report_id, name, query):
+    response = client.post(f"/reports/{report_id}/columns", headers = headers, json = {
+        "name" : name, "status" : "active", "query" : query, "connection_id" : "source"
+    })
+    assert response.status_code == 200, response.text
+
+def test_csv_export_streams_every_row(client, headers, report):
+    add_column(client, headers, report["id"], "amount", "SELECT amount FROM sales ORDER BY id")
+    add_column(client, headers, report["id"], "region", "SELECT region FROM sales ORDER BY id")
+
+    response = client.get(f"/reports/{report['id']}/export?format=csv", headers = headers)
+    assert response.status_code == 200
+
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["amount", "region"]
+    assert rows[1:3] == [["1", "EU"], ["2", "US"]]
+    assert len(rows) == 101
+
+def test_more_columns_than_connection_slots(client, headers, report):
+    # the columns past the slots only start once earlier ones are read
+    count = REPORT_MAX_PER_CONNECTION + 2
+    for i in range(count):
+        add_column(client, headers, report["id"], f"amount {i}", f"SELECT amount + {i} FROM sales ORDER BY id")
+
+    response = client.get(f"/reports/{report['id']}/export?format=ndjson", headers = headers)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert len(lines) == 100
+    assert list(lines[-1].values()) == [100 + i for i in range(count)]
+
+def test_failing_column_is_a_400_before_the_body(client, headers, report):
+    add_column(client, headers, report["id"], "amount", "SELECT amount FROM sales ORDER BY id")
+    add_column(client, headers, report["id"], "missing", "SELECT nope FROM sales")
+
+    response = client.get(f"/reports/{report['id']}/export", headers = headers)
+    assert response.status_code == 400
+    assert "missing" in response.json()["detail"]
+
+def test_cached_export_reads_the_stored_result(client, headers):
+    report_id = client.post("/reports", headers = headers, json = {
+        "title" : "Cached sales", "type" : "cached", "interval" : "daily", "status" : "active"
+    }).json()["id"]
+    add_column(client, headers, report_id, "amount", "SELECT amount FROM sales ORDER BY id")
+    client.post(f"/reports/{report_id}/run", headers = headers)
+
+    response = client.get(f"/reports/{report_id}/export?format=ndjson", headers = headers)
+    assert [json.loads(line)["amount"] for line in response.text.splitlines()] == list(range(1, 101))
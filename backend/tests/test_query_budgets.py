@@ -0,0 +1,47 @@
+import pytest
+
+from config.query_stats import query_budget
+
+REPORTS = 6
+COLUMNS_PER_REPORT = 4
+
+@pytest.fixture
+def populated(client, headers):
+    # enough reports and columns that a per-row query would blow every budget
+    report_ids = []
+
+    for i in range(REPORTS):
+        report_id = client.post("/reports", headers = headers, json = {
+            "title" : f"Report {i}", "type" : "realtime", "interval" : "daily", "status" : "active"
+        }).json()["id"]
+        report_ids.append(report_id)
+
+        for j in range(COLUMNS_PER_REPORT):
+            client.post(f"/reports/{report_id}/columns", headers = headers, json = {
+                "name" : f"column {j}", "status" : "active", "query" : "SELECT amount FROM sales", "connection_id" : "source"
+            })
+
+    column_id = client.get(f"/reports/{report_ids[0]}/columns", headers = headers).json()[0]["id"]
+    return report_ids[0], column_id
+
+# (method, path, body, budget); the current user is served from the principal cache
+BUDGETS = {
+    "GET /reports" : ("GET", "/reports", None, 1),
+    "GET /reports?include=columns" : ("GET", "/reports?include=columns", None, 2),
+    "GET /reports?fields=id,title" : ("GET", "/reports?fields=id,title", None, 1),
+    "GET /reports/{id}?include=columns" : ("GET", "/reports/{report_id}?include=columns", None, 2),
+    "GET /reports/{id}/columns" : ("GET", "/reports/{report_id}/columns", None, 2),
+    "PUT /reports/{id}" : ("PUT", "/reports/{report_id}", {"description" : "edited"}, 3),
+    "PUT /reports/{id}/columns/{cid}" : ("PUT", "/reports/{report_id}/columns/{column_id}", {"description" : "edited"}, 3)
+}
+
+@pytest.mark.parametrize("route", BUDGETS)
+def test_route_stays_within_its_query_budget(client, headers, populated, route):
+    method, path, body, budget = BUDGETS[route]
+    report_id, column_id = populated
+    url = path.format(report_id = report_id, column_id = column_id)
+
+    with query_budget(budget):
+        response = client.request(method, url, headers = headers, json = body)
+
+    assert response.status_code == 200, response.text
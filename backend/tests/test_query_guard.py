@@ -0,0 +1,120 @@
+import logging
+from types import SimpleNamespace
+
+import pymysql
+import pytest
+
+from app.services import query_guard_service
+from app.services.query_guard_service import QueryLimitError, statement_timeout
+
+# sales has 100 rows, over the limit; a single row table stays under it
+MAX_SCAN_ROWS = 50
+
+@pytest.fixture(autouse = True)
+def small_limits(monkeypatch):
+    monkeypatch.setattr(query_guard_service, "QUERY_GUARD_MAX_SCAN_ROWS", MAX_SCAN_ROWS)
+
+@pytest.fixture
+def explains(monkeypatch):
+    # the statements the guard EXPLAINed
+    planned = []
+    plan_verdict = query_guard_service.plan_verdict
+
+    def counting(conn, query, params):
+        planned.append(query)
+        return plan_verdict(conn, query, params)
+
+    monkeypatch.setattr(query_guard_service, "plan_verdict", counting)
+    return planned
+
+def run_column(client, headers, report, query, name = "amount"):
+    response = client.post(f"/reports/{report['id']}/columns", headers = headers, json = {
+        "name" : name, "status" : "active", "query" : query, "connection_id" : "source"
+    })
+    assert response.status_code == 200, response.text
+
+    response = client.post(f"/reports/{report['id']}/run", headers = headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+@pytest.mark.parametrize("query", [
+    "SELECT amount FROM sales",
+    "SELECT s.amount FROM sales s",
+    "SELECT s.amount FROM main.sales AS s WHERE s.region = 'EU'"
+])
+def test_reject_fails_a_full_scan_over_the_limit(client, headers, report, query):
+    result = run_column(client, headers, report, query)
+
+    assert result["rows"] == []
+    assert result["errors"]["amount"].startswith("Rejected by the query guard: full scan of")
+
+def test_scans_under_the_limit_run(client, headers, report):
+    result = run_column(client, headers, report, "SELECT amount FROM sales WHERE id = 1")
+    assert result["rows"] == [{"amount" : 1}]
+
+def test_flag_only_logs(client, headers, report, monkeypatch, caplog):
+    monkeypatch.setattr(query_guard_service, "QUERY_GUARD_ACTION", "flag")
+
+    with caplog.at_level(logging.WARNING, logger = query_guard_service.__name__):
+        result = run_column(client, headers, report, "SELECT amount FROM sales ORDER BY id")
+
+    assert len(result["rows"]) == 100
+    assert "fully scans" in caplog.text
+
+def test_off_never_explains(client, headers, report, monkeypatch, explains):
+    monkeypatch.setattr(query_guard_service, "QUERY_GUARD_ACTION", "off")
+
+    result = run_column(client, headers, report, "SELECT amount FROM sales")
+    assert len(result["rows"]) == 100
+    assert explains == []
+
+def test_one_explain_per_column_version(client, headers, report, monkeypatch, explains):
+    monkeypatch.setattr(query_guard_service, "QUERY_GUARD_ACTION", "flag")
+    run_column(client, headers, report, "SELECT amount FROM sales")
+    client.post(f"/reports/{report['id']}/run", headers = headers)
+    assert len(explains) == 1
+
+    column = client.get(f"/reports/{report['id']}/columns", headers = headers).json()[0]
+    client.put(f"/reports/{report['id']}/columns/{column['id']}", headers = headers, json = {"description" : "edited"})
+    client.post(f"/reports/{report['id']}/run", headers = headers)
+    assert len(explains) == 2
+
+def test_row_cap(client, headers, report, monkeypatch):
+    monkeypatch.setattr(query_guard_service, "COLUMN_QUERY_MAX_ROWS", 10)
+
+    result = run_column(client, headers, report, "SELECT amount FROM sales WHERE id <= 11")
+    assert result["errors"]["amount"] == "Column query returned more than 10 rows"
+
+def test_sqlite_statement_timeout(client, headers, report, monkeypatch):
+    monkeypatch.setattr(query_guard_service, "COLUMN_QUERY_TIMEOUT_SECONDS", 0.05)
+
+    result = run_column(client, headers, report, (
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000) "
+        "SELECT count(*) FROM n"
+    ))
+    assert result["errors"]["amount"] == "Column query exceeded the 0.05s statement timeout"
+
+class ServerConnection:
+    # stands in for a MySQL or PostgreSQL connection, the server side is not needed
+    def __init__(self, backend):
+        self.dialect = SimpleNamespace(name = backend)
+
+    def execute(self, statement):
+        pass
+
+class QueryCanceled(Exception):
+    pgcode = "57014"
+
+@pytest.mark.parametrize("backend, error", [
+    ("mysql", pymysql.err.OperationalError(3024, "Query execution was interrupted, maximum statement execution time exceeded")),
+    ("postgresql", QueryCanceled("canceling statement due to statement timeout"))
+])
+def test_server_timeouts_are_query_limit_errors(backend, error):
+    with pytest.raises(QueryLimitError, match = "exceeded the 2s statement timeout"):
+        with statement_timeout(ServerConnection(backend), 2):
+            raise error
+
+def test_other_server_errors_pass_through():
+    with pytest.raises(pymysql.err.OperationalError):
+        with statement_timeout(ServerConnection("mysql"), 2):
+            raise pymysql.err.OperationalError(1054, "Unknown column")
@@ -0,0 +1,77 @@
+import os
+import glob
+
+import pytest
+
+@pytest.fixture
+def cached_report(client, headers):
+    report_id = client.post("/reports", headers = headers, json = {
+        "title" : "Cached sales", "type" : "cached", "interval" : "daily", "status" : "active"
+    }).json()["id"]
+
+    for name in ("amount", "region"):
+        client.post(f"/reports/{report_id}/columns", headers = headers, json = {
+            "name" : name, "status" : "active", "query" : f"SELECT {name} FROM sales ORDER BY id", "connection_id" : "source"
+        })
+
+    client.post(f"/reports/{report_id}/run", headers = headers)
+    return report_id
+
+def test_pages_cover_the_stored_result(client, headers, cached_report):
+    rows = []
+    params = {"limit" : 30}
+
+    while True:
+        response = client.get(f"/reports/{cached_report}/results", headers = headers, params = params)
+        assert response.status_code == 200
+        rows += response.json()["rows"]
+
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+
+    assert [row["amount"] for row in rows] == list(range(1, 101))
+
+def test_sort_filter_and_columns(client, headers, cached_report):
+    response = client.get(f"/reports/{cached_report}/results", headers = headers, params = {
+        "sort" : "-amount", "filter" : ["region:eq:EU", "amount:lt:50"], "columns" : "amount", "limit" : 3
+    })
+    body = response.json()
+
+    assert body["total"] == 25
+    assert body["rows"] == [{"amount" : 49}, {"amount" : 47}, {"amount" : 45}]
+
+@pytest.mark.parametrize("columns, detail", [
+    ("amount,nope", "Unknown columns: nope"),
+    (",", "No columns requested")
+])
+def test_unknown_columns_are_rejected(client, headers, cached_report, columns, detail):
+    response = client.get(f"/reports/{cached_report}/results", headers = headers, params = {"columns" : columns})
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
+
+def test_a_file_written_before_an_edit_is_a_miss(client, headers, cached_report):
+    from app.services.report_cache_service import report_cache
+
+    [path] = glob.glob(os.path.join(os.environ["REPORT_RESULTS_DIR"], str(cached_report), "*", "*.arrow"))
+    with open(path, "rb") as file:
+        stale = file.read()
+
+    [column] = [item for item in client.get(f"/reports/{cached_report}/columns", headers = headers).json() if item["name"] == "amount"]
+    client.put(f"/reports/{cached_report}/columns/{column['id']}", headers = headers, json = {
+        "query" : "SELECT amount * 10 FROM sales ORDER BY id"
+    })
+
+    # a run that started before the edit writes its file after the discard,
+    # and another worker never held the new result in memory
+    with open(path, "wb") as file:
+        file.write(stale)
+    report_cache.invalidate_report(cached_report)
+
+    assert client.get(f"/reports/{cached_report}/results", headers = headers).status_code == 404
+
+    rows = client.post(f"/reports/{cached_report}/run", headers = headers).json()["rows"]
+    assert rows[:2] == [{"amount" : 10, "region" : "EU"}, {"amount" : 20, "region" : "US"}]
+
+    rows = client.get(f"/reports/{cached_report}/results", headers = headers, params = {"limit" : 2}).json()["rows"]
+    assert [row["amount"] for row in rows] == [10, 20]
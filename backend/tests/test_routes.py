@@ -0,0 +1,124 @@
+from conftest import PASSWORD, signup_and_login
+
+def column_payload(name = "amount", query = "SELECT amount FROM sales ORDER BY id"):
+    return {"name" : name, "status" : "active", "query" : query, "connection_id" : "source"}
+
+# AUTH
+def test_signup_rejects_a_taken_email(client):
+    email, _ = signup_and_login(client)
+    response = client.post("/auth/signup", json = {"email" : email, "password" : PASSWORD, "role" : "user"})
+    assert response.status_code == 400
+
+def test_login_rejects_a_wrong_password(client):
+    email, _ = signup_and_login(client)
+    response = client.post("/auth/login", data = {"username" : email, "password" : "wrong-password"})
+    assert response.status_code == 401
+
+def test_refresh_until_logout(client):
+    _, tokens = signup_and_login(client)
+    refresh = {"refresh_token" : tokens["refresh_token"]}
+
+    response = client.post("/auth/refresh", json = refresh)
+    assert response.status_code == 200
+    assert client.get("/reports", headers = {"Authorization" : f"Bearer {response.json()['access_token']}"}).status_code == 200
+
+    assert client.post("/auth/logout", json = refresh).status_code == 200
+    assert client.post("/auth/refresh", json = refresh).status_code == 401
+
+def test_reports_require_a_token(client):
+    assert client.get("/reports").status_code == 401
+
+# REPORTS
+def test_report_crud(client, headers, report):
+    response = client.get(f"/reports/{report['id']}", headers = headers)
+    assert response.status_code == 200
+    assert response.json()["title"] == "Sales by region"
+
+    response = client.put(f"/reports/{report['id']}", headers = headers, json = {"title" : "Sales per region"})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Sales per region"
+    assert response.json()["version"] == report["version"] + 1
+
+    listed = client.get("/reports", headers = headers).json()
+    assert [item["id"] for item in listed] == [report["id"]]
+
+    assert client.delete(f"/reports/{report['id']}", headers = headers).status_code == 200
+    assert client.get(f"/reports/{report['id']}", headers = headers).status_code == 404
+
+def test_reports_are_private_to_their_owner(client, report):
+    _, tokens = signup_and_login(client)
+    other = {"Authorization" : f"Bearer {tokens['access_token']}"}
+
+    assert client.get(f"/reports/{report['id']}", headers = other).status_code == 404
+    assert client.get("/reports", headers = other).json() == []
+
+def test_report_etag_answers_304_until_edited(client, headers, report):
+    response = client.get(f"/reports/{report['id']}", headers = headers)
+    etag = response.headers["ETag"]
+
+    assert client.get(f"/reports/{report['id']}", headers = {**headers, "If-None-Match" : etag}).status_code == 304
+
+    client.put(f"/reports/{report['id']}", headers = headers, json = {"description" : "edited"})
+    assert client.get(f"/reports/{report['id']}", headers = {**headers, "If-None-Match" : etag}).status_code == 200
+
+def test_report_list_pages_with_a_cursor(client, headers):
+    ids = [
+        client.post("/reports", headers = headers, json = {
+            "title" : f"Report {i}", "type" : "realtime", "interval" : "daily", "status" : "active"
+        }).json()["id"]
+        for i in range(5)
+    ]
+
+    response = client.get("/reports?limit=3", headers = headers)
+    first = [item["id"] for item in response.json()]
+    response = client.get(f"/reports?limit=3&cursor={response.headers['X-Next-Cursor']}", headers = headers)
+    second = [item["id"] for item in response.json()]
+
+    # newest first
+    assert first + second == ids[::-1]
+    assert "X-Next-Cursor" not in response.headers
+
+# COLUMNS
+def test_column_crud(client, headers, report):
+    base = f"/reports/{report['id']}/columns"
+
+    response = client.post(base, headers = headers, json = column_payload())
+    assert response.status_code == 200
+    column = response.json()
+
+    response = client.put(f"{base}/{column['id']}", headers = headers, json = {"description" : "Sale amount"})
+    assert response.status_code == 200
+    assert response.json()["version"] == column["version"] + 1
+
+    assert [item["id"] for item in client.get(base, headers = headers).json()] == [column["id"]]
+
+    response = client.get(f"/reports/{report['id']}?include=columns", headers = headers)
+    assert [item["name"] for item in response.json()["columns"]] == ["amount"]
+
+    assert client.delete(f"{base}/{column['id']}", headers = headers).status_code == 200
+    assert client.get(f"{base}/{column['id']}", headers = headers).status_code == 404
+
+def test_column_batch(client, headers, report):
+    base = f"/reports/{report['id']}/columns"
+    column = client.post(base, headers = headers, json = column_payload()).json()
+
+    response = client.post(f"{base}/batch", headers = headers, json = {
+        "create" : [column_payload("region", "SELECT region FROM sales ORDER BY id")],
+        "update" : [{"id" : column["id"], "description" : "Sale amount"}]
+    })
+    assert response.status_code == 200
+
+    columns = client.get(base, headers = headers).json()
+    assert {item["name"] : item["description"] for item in columns} == {"amount" : "Sale amount", "region" : None}
+
+# RUN
+def test_run_reflects_column_edits(client, headers, report):
+    base = f"/reports/{report['id']}/columns"
+    column = client.post(base, headers = headers, json = column_payload()).json()
+
+    rows = client.post(f"/reports/{report['id']}/run", headers = headers).json()["rows"]
+    assert rows[:2] == [{"amount" : 1}, {"amount" : 2}]
+
+    client.put(f"{base}/{column['id']}", headers = headers, json = {"query" : "SELECT amount * 10 FROM sales ORDER BY id"})
+    rows = client.post(f"/reports/{report['id']}/run", headers = headers).json()["rows"]
+    assert rows[:2] == [{"amount" : 10}, {"amount" : 20}]